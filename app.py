@@ -1,25 +1,72 @@
-from io import BytesIO
-import traceback
+import logging
+import time
 from datetime import datetime
 from calendar import month_name
 
 from flask import (
     Flask,
+    Response,
     flash,
+    g,
     redirect,
     request,
     render_template,
-    send_file,
     url_for,
     jsonify
 )
 
-from letterboxd_scraper import LetterboxdUser, LetterboxdWrapped
+from letterboxd_scraper import LetterboxdUser, LetterboxdWrapped, RenderCache, UserNotFoundError
+from letterboxd_scraper import metrics, render_pool
+from letterboxd_scraper.config import LOG_LEVEL
+from letterboxd_scraper.jobs import JobQueue, DONE
+from letterboxd_scraper.negative_cache import get_negative_cache
+from letterboxd_scraper.output import FORMATS, DEFAULT_FORMAT, negotiate_format, variant_name
+from letterboxd_scraper.themes import THEMES, DEFAULT_THEME
+
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+log = logging.getLogger(__name__)
+
+REQUEST_SECONDS = metrics.REGISTRY.histogram(
+    "letterboxd_http_request_seconds", "Wall time of requests served by the app", ("endpoint",)
+)
 
 # Tell Flask where to find templates
 app = Flask(__name__, template_folder='app/templates')
 app.secret_key = "letterboxd-wrapped-secret-key"
 
+# Finished wrapped images, keyed by (username, month, year, diary fingerprint, posters drawn)
+render_cache = RenderCache()
+
+# Background renders, identical in-flight requests share one job; state is in
+# SQLite, so any gunicorn worker can answer a poll
+render_jobs = JobQueue()
+
+@app.before_request
+def start_request_metrics():
+    g.metrics, g.metrics_token = metrics.start_request()
+    g.started = time.perf_counter()
+
+@app.after_request
+def attach_request_metrics(response):
+    collected = g.get("metrics")
+    if collected is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.started, endpoint=request.endpoint or "unknown")
+        timing = collected.server_timing()
+        if timing:
+            response.headers["Server-Timing"] = timing
+            log.debug("%s %s: %s", request.method, request.path, timing)
+    return response
+
+@app.teardown_request
+def end_request_metrics(exc):
+    token = g.pop("metrics_token", None)
+    if token is not None:
+        metrics.end_request(token)
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     current_month = datetime.now().month
@@ -76,40 +123,198 @@ def wrapped():
     flash("Username not provided.")
     return redirect(url_for("index"))
 
+def _wrapped_args(values):
+    """Read username/month/year/theme from request values, raises ValueError"""
+    username = values.get("username", "").strip()
+    if not username:
+        raise ValueError("Username is required")
+    month = int(values.get("month", datetime.now().month))
+    year = int(values.get("year", datetime.now().year))
+    theme = values.get("theme", DEFAULT_THEME)
+    if theme not in THEMES:
+        raise ValueError(f"Unknown theme: {theme}")
+    return username, month, year, theme
+
+def _output_variant(values, headers):
+    """Output format (explicit ?format= or negotiated from Accept) and preview flag"""
+    fmt = values.get("format") or negotiate_format(headers.get("Accept"))
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    preview = values.get("preview", "").lower() in ("1", "true", "yes")
+    return fmt, preview
+
+def _send_wrapped(data, etag, last_modified, fmt):
+    # The encoded bytes become the response body as-is, no file wrapper or copy
+    response = Response(data, mimetype=FORMATS[fmt].mimetype)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.vary.add("Accept")
+    return response.make_conditional(request)
+
 @app.route("/wrapped-img")
 def wrapped_img():
-    username = request.args.get("username", "").strip()
-    if not username:
-        return jsonify({"error": "Username is required"}), 400
-        
     try:
-        month = int(request.args.get("month", datetime.now().month))
-        year = int(request.args.get("year", datetime.now().year))
+        username, month, year, theme = _wrapped_args(request.args)
+        variant = _output_variant(request.args, request.headers)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
         
-        wrapped_io = create_wrapped_image(username, month, year)
-        return send_file(
-            wrapped_io,
-            mimetype="image/jpeg",
-            as_attachment=False
-        )
+    try:
+        user = LetterboxdUser(username)
+        wrapped = LetterboxdWrapped(user, month=month, year=year, theme=theme)
+        render = WrappedRender(username, month, year, theme, wrapped.fingerprint(), wrapped.poster_sources())
+
+        # Same diary contents and posters means the same image, no need to render again
+        etag = render.cache_key(variant) if render.sources is not None else None
+        if etag and request.if_none_match.contains(etag):
+            return "", 304, {"ETag": f'"{etag}"', "Vary": "Accept"}
+
+        [(data, last_modified)] = create_wrapped_image(render, [variant], wrapped.prepare)
+        return _send_wrapped(data, render.cache_key(variant), last_modified, variant[0])
+    except UserNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
     except Exception as e:
-        print(f"Error creating wrapped image: {e}")
-        traceback.print_exc()
+        log.exception("Error creating wrapped image: %s", e)
         return jsonify({"error": str(e)}), 500
 
-def create_wrapped_image(username, month, year):
-    wrapped_io = BytesIO()
-    
+def _job_payload(job):
+    payload = job.as_dict()
+    payload["status_url"] = url_for("wrapped_job_status", job_id=job.id)
+    if job.status == DONE:
+        payload["result_url"] = url_for("wrapped_job_image", job_id=job.id)
+        payload["preview_url"] = url_for("wrapped_job_image", job_id=job.id, preview=1)
+    return payload
+
+@app.route("/wrapped-jobs", methods=["POST"])
+def submit_wrapped_job():
     try:
-        user = LetterboxdUser(username)
-        wrapped = LetterboxdWrapped(user, month=month, year=year)
-        wrapped_image = wrapped.create()
-        wrapped_image.save(wrapped_io, format="JPEG", quality=95)
-        wrapped_io.seek(0)
-        return wrapped_io
-    except Exception as e:
-        print(f"Error in create_wrapped_image: {e}")
-        raise
+        username, month, year, theme = _wrapped_args(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Usernames that recently 404'd are refused before a job is even queued
+    if get_negative_cache().get("user", username.lower()):
+        return jsonify({"error": f"Letterboxd user '{username}' not found"}), 404
+
+    job = render_jobs.submit(
+        (username.lower(), month, year, theme),
+        render_wrapped_job, username, month, year, theme
+    )
+    return jsonify(_job_payload(job)), 202
+
+@app.route("/wrapped-jobs/<job_id>")
+def wrapped_job_status(job_id):
+    job = render_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(_job_payload(job))
+
+@app.route("/wrapped-jobs/<job_id>/image")
+def wrapped_job_image(job_id):
+    try:
+        variant = _output_variant(request.args, request.headers)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job = render_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    if job.status != DONE:
+        return jsonify(_job_payload(job)), 409
+
+    render = WrappedRender(**job.result)
+    etag = render.cache_key(variant) if render.sources is not None else None
+    if etag and request.if_none_match.contains(etag):
+        return "", 304, {"ETag": f'"{etag}"', "Vary": "Accept"}
+
+    # Only variants that aren't cached (not pre-rendered, evicted, or drawn
+    # with placeholders) are prepared again, from the stored diary and posters
+    [(data, last_modified)] = create_wrapped_image(render, [variant], lambda: _prepare_again(render))
+    return _send_wrapped(data, render.cache_key(variant), last_modified, variant[0])
+
+def _prepare_again(render):
+    wrapped = LetterboxdWrapped(LetterboxdUser(render.username), month=render.month, year=render.year,
+                                theme=render.theme)
+    # The diary may have changed since the job ran; key the result by what is drawn now
+    render.fingerprint = wrapped.fingerprint()
+    return wrapped.prepare()
+
+class WrappedRender:
+    """Identity of one wrapped image; every encoded variant is cached under it"""
+
+    def __init__(self, username, month, year, theme, fingerprint, sources=None):
+        self.username = username
+        self.month = month
+        self.year = year
+        self.theme = theme
+        self.fingerprint = fingerprint
+        # Digest of the posters drawn (RenderSpec.sources), None until known
+        self.sources = sources
+
+    def as_dict(self):
+        return {
+            "username": self.username, "month": self.month, "year": self.year, "theme": self.theme,
+            "fingerprint": self.fingerprint, "sources": self.sources,
+        }
+
+    def cache_key(self, variant):
+        fmt, preview = variant
+        return render_cache.make_key(
+            self.username, self.month, self.year, f"{self.fingerprint}|{self.sources}",
+            variant=f"{self.theme}|{variant_name(fmt, preview)}"
+        )
+
+def render_wrapped_job(username, month, year, theme):
+    """Render the download and preview variants into the render cache, returns WrappedRender.as_dict()"""
+    user = LetterboxdUser(username)
+    wrapped = LetterboxdWrapped(user, month=month, year=year, theme=theme)
+    render = WrappedRender(username, month, year, theme, wrapped.fingerprint(), wrapped.poster_sources())
+
+    # Results page shows the preview (browsers take WebP) and downloads the JPEG;
+    # nothing is prepared when both are already cached
+    preview_format = "webp" if "webp" in FORMATS else DEFAULT_FORMAT
+    create_wrapped_image(render, [(DEFAULT_FORMAT, False), (preview_format, True)], wrapped.prepare)
+    return render.as_dict()
+
+def create_wrapped_image(render, variants, prepare):
+    """Return (data, last_modified) per (format, preview) variant.
+
+    Cached variants are served as-is; the rest are rendered together from
+    a single prepare() call and one compose in the render pool. The cache
+    is only consulted once render.sources is known, and renders drawn with
+    placeholder posters are not cached, so failed posters are retried once
+    their negative-cache entries expire. render.sources is set from the
+    prepared spec, so render.cache_key() is the ETag of what was returned.
+    """
+    results = {}
+    missing = list(variants)
+    if render.sources is not None:
+        missing = []
+        for variant in variants:
+            cached = render_cache.get(render.cache_key(variant))
+            if cached is not None:
+                log.debug("Serving cached wrapped image %s", render.cache_key(variant))
+                results[variant] = cached
+            else:
+                missing.append(variant)
+
+    if missing:
+        try:
+            # Scraping and poster I/O here, compositing and encoding in the render pool
+            spec = prepare()
+            render.sources = spec.sources
+            encoded = render_pool.render(spec, missing)
+            for variant, data in zip(missing, encoded):
+                if spec.has_placeholders:
+                    results[variant] = (data, time.time())
+                else:
+                    results[variant] = (data, render_cache.put(render.cache_key(variant), data))
+        except Exception as e:
+            log.warning("Error in create_wrapped_image: %s", e)
+            raise
+
+    return [results[variant] for variant in variants]
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Diary/profile parsing throughput, lxml backend vs the BeautifulSoup one.
+
+    python -m benchmarks.bench_parse [fixture.html ...]
+
+Peak memory is the Python heap (tracemalloc); libxml2's own allocations
+are not included.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from letterboxd_scraper import parsing
+
+from .fixtures import FIXTURE_DIR
+
+def measure(parse, html, rounds):
+    tracemalloc.start()
+    parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = parse(html)
+    elapsed = (time.perf_counter() - start) / rounds
+    return result, elapsed, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("fixtures", nargs="*")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    diary_fixtures = args.fixtures or sorted(str(p) for p in FIXTURE_DIR.glob("diary_*.html"))
+    backends = {
+        "bs4": (parsing.parse_diary_page_bs4, parsing.parse_profile_page_bs4),
+        "lxml": (parsing.parse_diary_page_lxml, parsing.parse_profile_page_lxml),
+    }
+
+    for path in diary_fixtures:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        print(path)
+        for name, (parse_diary, _) in backends.items():
+            rows, elapsed, peak = measure(parse_diary, html, args.rounds)
+            print(f"  {name:>5}: {len(rows) / elapsed:10.0f} rows/s  {elapsed * 1000:7.2f} ms/page  peak {peak / 1024:8.1f} KiB")
+
+    profile_path = FIXTURE_DIR / "profile.html"
+    html = profile_path.read_text(encoding="utf-8")
+    print(profile_path)
+    for name, (_, parse_profile) in backends.items():
+        _, elapsed, peak = measure(lambda h: parse_profile(h, "fixture"), html, args.rounds)
+        print(f"  {name:>5}: {elapsed * 1000:7.2f} ms/page  peak {peak / 1024:8.1f} KiB")
+
+if __name__ == "__main__":
+    sys.exit(main())
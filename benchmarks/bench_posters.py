@@ -0,0 +1,50 @@
+"""Compare serial vs concurrent poster fetching against the stub server.
+
+    python -m benchmarks.bench_posters --films 30 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from .stub_server import StubServer
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--films", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every stub response")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    server = StubServer(latency=args.latency).start()
+    data_dir = tempfile.TemporaryDirectory(prefix="letterboxd-bench-")
+    os.environ["LETTERBOXD_URL"] = server.base_url
+    os.environ["LETTERBOXD_DATA_DIR"] = data_dir.name
+    os.environ.setdefault("LETTERBOXD_RATE_LIMIT", "0")
+
+    from letterboxd_scraper.film import Film
+    from letterboxd_scraper.posters import resolve_posters
+
+    def make_films():
+        # Fresh slugs every round so the on-disk poster cache stays cold
+        run = uuid.uuid4().hex[:8]
+        return [Film(f"Film {i}", 2000, f"bench-{run}-{i}") for i in range(args.films)]
+
+    results = {}
+    for label, workers in (("serial", 1), ("concurrent", args.workers)):
+        films = make_films()
+        start = time.perf_counter()
+        posters = resolve_posters(films, max_workers=workers)
+        results[label] = time.perf_counter() - start
+        assert len(posters) == len(films)
+
+    server.stop()
+    data_dir.cleanup()
+    for label, elapsed in results.items():
+        print(f"{label:>10}: {elapsed * 1000:8.1f} ms for {args.films} films")
+    print(f"   speedup: {results['serial'] / results['concurrent']:.1f}x")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Cold vs warm cost of turning posters into rounded grid tiles.
+
+    python -m benchmarks.bench_tiles --posters 20
+"""
+import argparse
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from letterboxd_scraper.config import IMG_DIM
+from letterboxd_scraper.tiles import TileCache
+from letterboxd_scraper.wrapped import LetterboxdWrapped
+
+from .stub_server import synthetic_poster
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posters", type=int, default=20)
+    parser.add_argument("--width", type=int, default=180)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    width, height, radius = args.width, int(args.width * 1.5), 12
+    sources = [
+        synthetic_poster(f"tile-{i}", (IMG_DIM.width, IMG_DIM.height))
+        for i in range(args.posters)
+    ]
+    wrapped = LetterboxdWrapped(user=None, month=1, year=2025)
+
+    def run(cache):
+        start = time.perf_counter()
+        for i, data in enumerate(sources):
+            image = Image.open(BytesIO(data))
+            cache.get_or_create(
+                f"tile-{i}", width, height, radius,
+                lambda: wrapped._add_rounded_corners(
+                    wrapped._resize_image_clean(image, width, height), radius=radius
+                )
+            )
+        return (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_times = []
+        for r in range(args.rounds):
+            tile_dir = Path(tmp) / f"round-{r}"
+            tile_dir.mkdir()
+            cold_times.append(run(TileCache(tile_dir)))
+        cold = min(cold_times)
+
+        # Fresh caches over a populated directory: tiles come from disk
+        warm_disk = min(run(TileCache(tile_dir)) for _ in range(args.rounds))
+
+        warm_cache = TileCache(tile_dir)
+        run(warm_cache)
+        warm_memory = min(run(warm_cache) for _ in range(args.rounds))
+
+    print(f"       cold: {cold:8.1f} ms for {args.posters} tiles")
+    print(f"  warm disk: {warm_disk:8.1f} ms")
+    print(f"warm memory: {warm_memory:8.1f} ms")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Synthetic Letterboxd pages shaped like the real markup.
+
+    python -m benchmarks.fixtures   # (re)writes benchmarks/fixtures/*.html
+"""
+import random
+import zlib
+from datetime import date, timedelta
+from html import escape
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+# Rows per diary page on letterboxd.com
+DIARY_PAGE_SIZE = 50
+
+# Saved diary pages: a quiet month, a typical one and a full page
+DIARY_FIXTURE_SIZES = (5, 20, 50)
+
+STARS = ["", "½", "★", "★½", "★★", "★★½", "★★★", "★★★½", "★★★★", "★★★★½", "★★★★★"]
+
+def diary_row(watched, title, slug, year, rating, liked, rewatch, show_calendar):
+    calendar = (
+        f'<div class="date"><strong><a href="/films/diary/for/{watched.year}/{watched.month:02d}/">'
+        f'{watched.strftime("%b")}</a></strong><small>{watched.year}</small></div>'
+        if show_calendar else ""
+    )
+    return f"""
+<tr class="diary-entry-row viewing-poster-container">
+  <td class="td-calendar">{calendar}</td>
+  <td class="td-day diary-day center"><a href="/films/diary/for/{watched.year}/{watched.month:02d}/{watched.day:02d}/">{watched.day}</a></td>
+  <td class="td-film-details">
+    <div class="really-lazy-load poster film-poster" data-film-slug="{slug}" data-film-id="{sum(slug.encode()) * 7919 % 100000}">
+      <img alt="{escape(title)}" class="image" src="https://s.ltrbxd.com/static/img/empty-poster-35.png" width="35" height="52"/>
+      <span class="frame"><span class="frame-title"></span></span>
+    </div>
+    <h3 class="headline-3 prettify"><a href="/film/{slug}/">{escape(title)}</a></h3>
+  </td>
+  <td class="td-released center"><span>{year}</span></td>
+  <td class="td-rating rating-green">
+    <div class="hide-for-owner"><span class="rating rated-{STARS.index(rating)}"> {rating} </span></div>
+  </td>
+  <td class="td-like center diary-like">{'<span class="has-icon icon-16 large-liked icon-liked hide-for-owner">Liked</span>' if liked else ''}</td>
+  <td class="td-rewatch center{'' if rewatch else ' icon-status-off'}"><span class="has-icon icon-rewatch icon-16">Rewatch</span></td>
+  <td class="td-review center"></td>
+  <td class="td-actions film-actions has-menu hide-when-logged-out"></td>
+</tr>"""
+
+def diary_entries(count, newest=date(2025, 7, 31), seed=1, every_days=1):
+    """Deterministic (watched, title, slug, year, rating, liked, rewatch) tuples, newest first"""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        watched = newest - timedelta(days=i * every_days)
+        slug = f"film-{seed}-{i}"
+        entries.append((
+            watched,
+            f"Film {seed}-{i}",
+            slug,
+            rng.randint(1930, 2025),
+            rng.choice(STARS),
+            rng.random() < 0.3,
+            rng.random() < 0.1,
+        ))
+    return entries
+
+def user_diary(username, count, newest=date(2025, 7, 31)):
+    """Deterministic diary for a stub-server user, one film a day, newest first"""
+    return diary_entries(count, newest=newest, seed=zlib.crc32(username.encode("utf-8")))
+
+def pagination_html(page, pages):
+    """Letterboxd-style page links: first, last and the pages around the current one"""
+    if pages <= 1:
+        return ""
+    shown = sorted({1, pages, *range(max(1, page - 1), min(pages, page + 1) + 1)})
+    items = []
+    for i, n in enumerate(shown):
+        if i and n - shown[i - 1] > 1:
+            items.append('<li class="paginate-page unseen-pages">&hellip;</li>')
+        if n == page:
+            items.append(f'<li class="paginate-page paginate-current"><span>{n}</span></li>')
+        else:
+            items.append(f'<li class="paginate-page"><a href="page/{n}/">{n}</a></li>')
+    return f'''
+<div class="pagination">
+<div class="paginate-nextprev">{f'<a class="next" href="page/{page + 1}/">Older</a>' if page < pages else ''}</div>
+<div class="paginate-pages"><ul>{''.join(items)}</ul></div>
+</div>'''
+
+def diary_page_html(entries, page=1, pages=1):
+    rows = []
+    previous = None
+    for watched, title, slug, year, rating, liked, rewatch in entries:
+        month = (watched.year, watched.month)
+        rows.append(diary_row(watched, title, slug, year, rating, liked, rewatch, month != previous))
+        previous = month
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Diary • Letterboxd</title></head>
+<body class="diary">
+<div id="content" class="site-body"><div class="content-wrap">
+<table id="diary-table" class="table film-table">
+<thead><tr><th>Month</th><th>Day</th><th>Film</th><th>Released</th><th>Rating</th><th>Like</th><th>Rewatch</th><th>Review</th><th></th></tr></thead>
+<tbody>{''.join(rows)}
+</tbody></table>{pagination_html(page, pages)}
+</div></div></body></html>"""
+
+def profile_page_html(username="fixture", films=1234, this_year=123, lists=12, following=34, followers=56,
+                      pro=True, bio=True, favourites=4):
+    faves = "".join(
+        f'<li class="poster-container favourite-film-poster-container">'
+        f'<div class="really-lazy-load poster film-poster" data-film-slug="fave-{i}">'
+        f'<img alt="Favourite {i}" class="image" src="https://s.ltrbxd.com/static/img/empty-poster-150.png"/></div></li>'
+        for i in range(favourites)
+    )
+    badge = '<span class="badge -pro">Pro</span>' if pro else ""
+    bio_section = (
+        '<section id="person-bio" class="section"><div class="collapsible-text body-text -small">'
+        '<p>Watching films.</p><p>Mostly horror.</p></div></section>'
+        if bio else ""
+    )
+    stats = "".join(
+        f'<h4 class="profile-statistic statistic"><a href="#"><span class="value">{value:,}</span>'
+        f'<span class="definition">{label}</span></a></h4>'
+        for value, label in (
+            (films, "Films"), (this_year, "This year"), (lists, "Lists"),
+            (following, "Following"), (followers, "Followers")
+        )
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{username} • Letterboxd</title></head>
+<body class="profile">
+<section class="profile-header">
+  <div class="profile-summary">
+    <div class="profile-name-wrap"><h1 class="title-3">{escape(username.title())}</h1>{badge}</div>
+    <div class="profile-stats">{stats}</div>
+  </div>
+</section>
+{bio_section}
+<section id="favourites" class="section"><ul class="poster-list -p150 -horizontal">{faves}</ul></section>
+</body></html>"""
+
+def write_fixtures():
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    written = []
+    for rows in DIARY_FIXTURE_SIZES:
+        path = FIXTURE_DIR / f"diary_{rows}.html"
+        path.write_text(diary_page_html(diary_entries(rows)), encoding="utf-8")
+        written.append(path)
+    profiles = {
+        "profile.html": profile_page_html(),
+        "profile_minimal.html": profile_page_html("newcomer", 3, 3, 0, 1, 0, pro=False, bio=False, favourites=0),
+    }
+    for name, html in profiles.items():
+        path = FIXTURE_DIR / name
+        path.write_text(html, encoding="utf-8")
+        written.append(path)
+    return written
+
+if __name__ == "__main__":
+    for path in write_fixtures():
+        print(path)
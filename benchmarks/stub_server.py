@@ -0,0 +1,163 @@
+"""Local stand-in for letterboxd.com used by the offline benchmarks.
+
+Point the scraper at it with LETTERBOXD_URL=http://127.0.0.1:<port> before
+importing letterboxd_scraper.
+
+Every username has a deterministic diary (see fixtures.user_diary), served
+as profile, diary and month/year-scoped diary pages of 50 rows with
+pagination links like the real site, plus poster lookups and synthetic
+poster images. Latency, jitter and a share of 503 responses can be
+injected to exercise the client's retries.
+"""
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from PIL import Image
+
+from .fixtures import DIARY_PAGE_SIZE, diary_page_html, profile_page_html, user_diary
+
+POSTER_LOOKUP = re.compile(r"^/ajax/poster/film/(?P<slug>[^/]+)/std/\d+x\d+/?$")
+POSTER_IMAGE = re.compile(r"^/poster-img/(?P<slug>[^/]+)\.jpg$")
+DIARY = re.compile(
+    r"^/(?P<user>[^/]+)/films/diary/(?:for/(?P<year>\d{4})/(?:(?P<month>\d{2})/)?)?page/(?P<page>\d+)/?$"
+)
+PROFILE = re.compile(r"^/(?P<user>[^/]+)/?$")
+
+def synthetic_poster(slug, size=(230, 345)):
+    """Solid-colour JPEG whose colour is derived from the slug"""
+    seed = sum(slug.encode("utf-8"))
+    color = (seed * 37 % 256, seed * 59 % 256, seed * 83 % 256)
+    buf = BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split("?", 1)[0]
+        server.count(path)
+
+        delay = server.delay()
+        if delay:
+            time.sleep(delay)
+        if server.should_fail():
+            server.count_error()
+            return self._send(503, b"injected error")
+
+        match = POSTER_LOOKUP.match(path)
+        if match:
+            src = f"{server.base_url}/poster-img/{match['slug']}.jpg"
+            body = f'<div class="film-poster"><img class="image" src="{src}" /></div>'
+            return self._send(200, body.encode("utf-8"))
+
+        match = POSTER_IMAGE.match(path)
+        if match:
+            return self._send(200, synthetic_poster(match["slug"]), "image/jpeg")
+
+        match = DIARY.match(path)
+        if match:
+            entries = server.diary(match["user"])
+            if match["year"]:
+                year = int(match["year"])
+                entries = [e for e in entries if e[0].year == year]
+            if match["month"]:
+                month = int(match["month"])
+                entries = [e for e in entries if e[0].month == month]
+            page = int(match["page"])
+            pages = -(-len(entries) // DIARY_PAGE_SIZE)
+            rows = entries[(page - 1) * DIARY_PAGE_SIZE:page * DIARY_PAGE_SIZE]
+            return self._send(200, diary_page_html(rows, page, pages).encode("utf-8"))
+
+        match = PROFILE.match(path)
+        if match:
+            return self._send(200, profile_page_html(match["user"]).encode("utf-8"))
+
+        self._send(404, b"not found")
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connects from a burst of async requests,
+    # which then wait out a one second SYN retransmit
+    request_queue_size = 128
+
+    def __init__(self, latency=0.0, port=0, jitter=0.0, error_rate=0.0, diary_size=120, seed=0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.diary_size = diary_size
+        self.hits = 0
+        self.hits_by_kind = {}
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._diaries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        if POSTER_LOOKUP.match(path):
+            kind = "poster_lookup"
+        elif POSTER_IMAGE.match(path):
+            kind = "poster_image"
+        elif DIARY.match(path):
+            kind = "diary"
+        elif PROFILE.match(path):
+            kind = "profile"
+        else:
+            kind = "other"
+        with self._lock:
+            self.hits += 1
+            self.hits_by_kind[kind] = self.hits_by_kind.get(kind, 0) + 1
+
+    def count_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def delay(self):
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def diary(self, username):
+        with self._lock:
+            entries = self._diaries.get(username)
+            if entries is None:
+                entries = self._diaries[username] = user_diary(username, self.diary_size)
+            return entries
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
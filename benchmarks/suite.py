@@ -0,0 +1,363 @@
+"""Offline benchmark scenarios with p50/p95 latency, throughput and a stored baseline.
+
+    python -m benchmarks.suite                         # all scenarios, compared to baseline.json
+    python -m benchmarks.suite cold_render warm_render --latency 0.02
+    python -m benchmarks.suite --errors 0.05           # inject 503s to exercise retries
+    python -m benchmarks.suite --save-baseline         # record the current numbers
+
+Scenarios:
+  parse           diary page fixtures through the configured parser
+  layout          grid layout and stats for 5-40 posters, no images
+  cold_render     LetterboxdWrapped.create + JPEG for a new user (empty caches)
+  warm_render     the same month again (diary store, poster and tile caches warm)
+  concurrent      cold renders from --concurrency threads at once
+  async_posters   a new user's month of posters fetched with asyncio.gather (needs aiohttp),
+                  also reports the longest the event loop was blocked
+
+Everything runs against a local StubServer with LETTERBOXD_DATA_DIR in a
+temp dir, so no network is needed and the repo's caches are untouched.
+Exits with status 1 when a scenario's p50 or p95 is more than --tolerance
+(and more than --min-delta-ms) slower than the baseline. The baseline only
+gates runs with the same parameters on the same machine; otherwise the
+deltas are printed for information and the exit status is 0.
+
+Each scenario also reports the process' peak RSS once it finished and how
+much the scenario raised it ("+MB"); run a single render scenario to see
+the peak of that render path alone. Memory is reported, not compared.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+from .fixtures import FIXTURE_DIR
+from .stub_server import StubServer
+
+BASELINE = Path(__file__).parent / "baseline.json"
+SCENARIOS = ("parse", "layout", "cold_render", "warm_render", "concurrent", "async_posters")
+
+# The rendered month; the stub's diaries end on 2025-07-31
+MONTH, YEAR = 7, 2025
+
+def percentile(samples, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def summarize(latencies, wall):
+    return {
+        "n": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "ops_per_s": round(len(latencies) / wall, 2),
+    }
+
+def peak_rss_mb():
+    """High-water mark of this process' resident set size, None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def cpu_model():
+    """The CPU's marketing name where the platform exposes it"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+def machine():
+    """Where the numbers were taken; baselines only compare on the same machine"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cpu_model": cpu_model(),
+        "recorded": time.strftime("%Y-%m-%d"),
+    }
+
+def mismatches(report, baseline):
+    """How the baseline's run differs from this one, empty when they are comparable"""
+    differences = []
+    if baseline.get("params") != report["params"]:
+        differences.append(f"params {baseline.get('params')}")
+    # The recording date doesn't matter, everything else about the machine does
+    recorded_on = {k: v for k, v in baseline.get("machine", {}).items() if k != "recorded"}
+    if recorded_on != {k: v for k, v in report["machine"].items() if k != "recorded"}:
+        differences.append(f"machine {baseline.get('machine')}")
+    return differences
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+class Suite:
+    def __init__(self, args):
+        # Imported here so LETTERBOXD_URL / LETTERBOXD_DATA_DIR are already set
+        from letterboxd_scraper import LetterboxdUser, LetterboxdWrapped, metrics, parsing
+        from letterboxd_scraper.output import encode
+
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.LetterboxdUser = LetterboxdUser
+        self.LetterboxdWrapped = LetterboxdWrapped
+        self.metrics = metrics
+        self.parsing = parsing
+        self.encode = encode
+
+    def render(self, username):
+        wrapped = self.LetterboxdWrapped(self.LetterboxdUser(username), month=MONTH, year=YEAR)
+        return self.encode(wrapped.create(), "jpeg")
+
+    def setup_parse(self):
+        self.pages = [p.read_text(encoding="utf-8") for p in sorted(FIXTURE_DIR.glob("diary_*.html"))]
+        self.parsing.parse_diary_page(self.pages[0])  # warm up lxml / compiled XPaths
+
+    def parse(self):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(self.args.rounds * 10):
+            for html in self.pages:
+                latencies.append(timed(self.parsing.parse_diary_page, html))
+        return latencies, time.perf_counter() - start
+
+    def layout(self):
+        entries = self.parsing.parse_diary_page((FIXTURE_DIR / "diary_50.html").read_text(encoding="utf-8"))
+        wrapped = self.LetterboxdWrapped(None, month=MONTH, year=YEAR)
+
+        def layout_once(count):
+            wrapped._calculate_stats(entries[:count])
+            wrapped._create_professional_grid([None] * count, entries[:count])
+
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(self.args.rounds * 10):
+            for count in (5, 10, 20, 40):
+                latencies.append(timed(layout_once, count))
+        return latencies, time.perf_counter() - start
+
+    def cold_render(self):
+        # A new username per round means new slugs: diary, posters and tiles all miss
+        latencies = []
+        start = time.perf_counter()
+        for i in range(self.args.rounds):
+            latencies.append(timed(self.render, f"cold-{self.run_id}-{i}"))
+        return latencies, time.perf_counter() - start
+
+    def setup_warm_render(self):
+        self.warm_user = f"warm-{self.run_id}"
+        self.render(self.warm_user)
+
+    def warm_render(self):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(self.args.rounds):
+            latencies.append(timed(self.render, self.warm_user))
+        return latencies, time.perf_counter() - start
+
+    def concurrent(self):
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(n):
+            for i in range(self.args.rounds):
+                elapsed = timed(self.render, f"load-{self.run_id}-{n}-{i}")
+                with lock:
+                    latencies.append(elapsed)
+
+        threads = [
+            threading.Thread(target=self.metrics.bind(worker), args=(n,))
+            for n in range(self.args.concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, time.perf_counter() - start
+
+    def setup_async_posters(self):
+        # Diaries are loaded up front, only the poster fetches are timed
+        self.async_entries = [
+            self.LetterboxdUser(f"async-{self.run_id}-{i}").diary(year=YEAR, month=MONTH)
+            for i in range(self.args.rounds)
+        ]
+
+    async def _afetch_posters(self, entries):
+        from letterboxd_scraper.async_client import close_async_client
+
+        async def watch_loop():
+            # A 1 ms tick that comes late means something blocked the loop
+            while True:
+                before = time.perf_counter()
+                await asyncio.sleep(0.001)
+                stall = (time.perf_counter() - before - 0.001) * 1000
+                self.extra["max_loop_stall_ms"] = round(max(self.extra.get("max_loop_stall_ms", 0.0), stall), 2)
+
+        watcher = asyncio.ensure_future(watch_loop())
+        try:
+            await asyncio.gather(*(entry.afetch_poster() for entry in entries))
+        finally:
+            watcher.cancel()
+            await close_async_client()
+
+    def async_posters(self):
+        latencies = []
+        start = time.perf_counter()
+        for entries in self.async_entries:
+            latencies.append(timed(asyncio.run, self._afetch_posters(entries)))
+        return latencies, time.perf_counter() - start
+
+    def run(self, name):
+        setup = getattr(self, f"setup_{name}", None)
+        if setup is not None:
+            setup()
+
+        self.extra = {}  # scenario-specific numbers, added to the result
+        rss_before = peak_rss_mb()
+        collected, token = self.metrics.start_request()
+        try:
+            latencies, wall = getattr(self, name)()
+        finally:
+            self.metrics.end_request(token)
+        result = summarize(latencies, wall)
+        result["peak_rss_mb"] = peak_rss_mb()
+        if rss_before is not None:
+            result["peak_rss_growth_mb"] = round(result["peak_rss_mb"] - rss_before, 1)
+        result.update(self.extra)
+        result["stages_ms"] = {
+            stage: round(ms / len(latencies), 2) for stage, (_, ms) in collected.stages().items()
+        }
+        return result
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Print deltas against the baseline, return the names of regressed scenarios"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"  {name:<13} no baseline")
+            continue
+        deltas = []
+        regressed = False
+        for key in ("p50_ms", "p95_ms"):
+            change = (result[key] - base[key]) / base[key] if base[key] else 0.0
+            deltas.append(f"{key[:3]} {change:+7.1%}")
+            # Sub-millisecond scenarios are noisy, ignore tiny absolute changes
+            regressed |= change > tolerance and result[key] - base[key] > min_delta_ms
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {name:<13} {'  '.join(deltas)}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"any of {', '.join(SCENARIOS)}")
+    parser.add_argument("--rounds", type=int, default=5, help="renders per scenario (x10 for parse/layout)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds added to every stub response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random extra latency")
+    parser.add_argument("--errors", type=float, default=0.0, help="share of stub responses that are 503s")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON")
+    parser.add_argument("--stages", action="store_true", help="print per-stage time per operation")
+    args = parser.parse_args(argv)
+    scenarios = args.scenarios or list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    server = StubServer(latency=args.latency, jitter=args.jitter, error_rate=args.errors).start()
+    data_dir = tempfile.TemporaryDirectory(prefix="letterboxd-bench-")
+    os.environ["LETTERBOXD_URL"] = server.base_url
+    os.environ["LETTERBOXD_DATA_DIR"] = data_dir.name
+    os.environ.setdefault("LETTERBOXD_RATE_LIMIT", "0")
+
+    params = {
+        "rounds": args.rounds, "concurrency": args.concurrency, "latency": args.latency,
+        "jitter": args.jitter, "errors": args.errors,
+    }
+    suite = Suite(args)
+    results = {}
+    print(f"{'scenario':<13} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10} {'ops/s':>9} {'peak RSS':>16}")
+    try:
+        for name in scenarios:
+            result = results[name] = suite.run(name)
+            rss = ""
+            if result["peak_rss_mb"] is not None:
+                rss = f"{result['peak_rss_mb']:.1f} MB (+{result['peak_rss_growth_mb']:.1f})"
+            print(
+                f"{name:<13} {result['n']:>5} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f}"
+                f" {result['mean_ms']:>10.2f} {result['ops_per_s']:>9.2f} {rss:>16}"
+            )
+            if "max_loop_stall_ms" in result:
+                print(f"    {'max loop stall':<16} {result['max_loop_stall_ms']:>10.2f} ms")
+            if args.stages:
+                for stage, ms in result["stages_ms"].items():
+                    print(f"    {stage:<16} {ms:>10.2f} ms/op")
+    finally:
+        server.stop()
+        data_dir.cleanup()
+    print(f"stub server: {server.hits} requests ({server.errors} injected errors) {server.hits_by_kind}")
+
+    report = {
+        "params": params,
+        "machine": machine(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.save_baseline:
+        if args.baseline.exists():
+            merged = json.loads(args.baseline.read_text())
+            if not mismatches(report, merged):
+                # Keep baseline numbers for scenarios that weren't run this time
+                merged.update({k: v for k, v in report.items() if k != "results"})
+                merged.setdefault("results", {}).update(results)
+                report = merged
+        args.baseline.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("no baseline to compare against (run with --save-baseline)")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    print(f"\ncompared to {args.baseline.name} (tolerance {args.tolerance:.0%}):")
+    differences = mismatches(report, baseline)
+    for difference in differences:
+        print(f"  note: baseline was recorded with {difference}")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if differences:
+        print("  not a like-for-like run, regressions are not failed")
+        return 0
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
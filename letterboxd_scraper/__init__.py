@@ -1,2 +1,3 @@
-from .letterboxd_user import LetterboxdUser
-from .wrapped import LetterboxdWrapped
\ No newline at end of file
+from .letterboxd_user import LetterboxdUser, UserNotFoundError
+from .wrapped import LetterboxdWrapped, LetterboxdRecap
+from .render_cache import RenderCache
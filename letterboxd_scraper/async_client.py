@@ -0,0 +1,163 @@
+import asyncio
+import time
+import weakref
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # only the async API (adiary, aprofile, aposter) needs it
+    aiohttp = None
+
+from .config import HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_ASYNC_CONCURRENCY, REQUEST_TIMEOUT
+from .http_client import DEFAULT_HEADERS, RETRY_STATUSES, HostStats, backoff, get_client
+from . import metrics
+
+class AsyncResponse:
+    """A fully read response, with the requests.Response attributes the scraper uses"""
+
+    __slots__ = ("url", "status_code", "headers", "content", "encoding")
+
+    def __init__(self, url, status_code, headers, content, encoding=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self):
+        # Same exception as the sync client, so 404 handling is shared
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+class AsyncHttpClient:
+    """asyncio counterpart of HttpClient for one event loop.
+
+    One aiohttp session with a pooled connector, at most `concurrency`
+    requests in flight per host (a semaphore), the same per-host token
+    buckets as the sync client, the same retries, and identical GETs that
+    are already in flight shared rather than sent again.
+    """
+
+    def __init__(self, concurrency=HTTP_ASYNC_CONCURRENCY, max_retries=HTTP_MAX_RETRIES,
+                 pool_size=HTTP_POOL_SIZE):
+        if aiohttp is None:
+            raise RuntimeError("The async API requires aiohttp (pip install aiohttp)")
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self._session = None
+        self._semaphores = {}
+        self._in_flight = {}  # (url, cookies) -> Task
+        self._stats = defaultdict(HostStats)
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                cookie_jar=aiohttp.DummyCookieJar()
+            )
+        return self._session
+
+    def _semaphore(self, host):
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    def _record(self, host, elapsed_ms, error=False, retry=False):
+        stats = self._stats[host]
+        stats.requests += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        if error:
+            stats.errors += 1
+        if retry:
+            stats.retries += 1
+
+    async def get(self, url, cookies=None, timeout=REQUEST_TIMEOUT) -> AsyncResponse:
+        """GET with rate limiting and retries, raises requests.HTTPError for non-2xx responses"""
+        key = (url, tuple(sorted(cookies.items())) if cookies else None)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.ensure_future(self._get(url, cookies, timeout))
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            metrics.inc(metrics.COALESCED_CALLS, group="async_http")
+        # A cancelled caller must not cancel the fetch other callers are waiting on
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def _get(self, url, cookies, timeout):
+        host = urlsplit(url).netloc
+        bucket = get_client().bucket(host)
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            await bucket.acquire_async()
+            try:
+                async with self._semaphore(host):
+                    start = time.perf_counter()
+                    async with session.get(url, cookies=cookies, timeout=client_timeout) as res:
+                        response = AsyncResponse(url, res.status, res.headers, await res.read(), res.charset)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self._record(host, (time.perf_counter() - start) * 1000, error=True, retry=not last_attempt)
+                if last_attempt:
+                    # Raised as the requests equivalent, callers handle both clients alike
+                    error = requests.Timeout if isinstance(e, asyncio.TimeoutError) else requests.ConnectionError
+                    raise error(f"{type(e).__name__} for url: {url}") from e
+                await asyncio.sleep(backoff(attempt))
+                continue
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                self._record(host, elapsed_ms, error=True, retry=True)
+                await asyncio.sleep(backoff(attempt, response))
+                continue
+
+            self._record(host, elapsed_ms, error=not response.ok)
+            response.raise_for_status()
+            metrics.inc(metrics.DOWNLOADED_BYTES, len(response.content), host=host)
+            return response
+
+    def stats(self):
+        """Per-host latency counters"""
+        return {host: stats.as_dict() for host, stats in self._stats.items()}
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncHttpClient
+
+def get_async_client() -> AsyncHttpClient:
+    """Return the shared client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncHttpClient()
+    return client
+
+async def close_async_client():
+    """Close the running loop's client; call before the loop shuts down"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
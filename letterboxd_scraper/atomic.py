@@ -0,0 +1,25 @@
+import os
+import tempfile
+from pathlib import Path
+
+def write_atomic(path, data):
+    """Write bytes, or whatever data(f) writes, to path through a temp file and a rename.
+
+    Readers (or another worker writing the same file) never see a partial
+    file, and the temp file is removed when writing or renaming fails.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if callable(data):
+                data(f)
+            else:
+                f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -2,10 +2,102 @@ import os
 from pathlib import Path
 from dataclasses import dataclass
 
-POSTER_DIR = Path(__file__).parent.parent.resolve() / "posters"
+# Logging level for the app, CLI and render workers (DEBUG shows every fetch)
+LOG_LEVEL = os.environ.get("LETTERBOXD_LOG_LEVEL", "INFO").upper()
+
+# Base URL for all scraping, override to point at a local stub server
+LETTERBOXD_URL = os.environ.get("LETTERBOXD_URL", "https://letterboxd.com").rstrip("/")
+
+# Safety cap on diary pages read for one date range
+DIARY_MAX_PAGES = 100
+
+# Rows per diary page on letterboxd.com, and how many pages after the first
+# one diary scan may fetch at once (on top of the per-host rate limit)
+DIARY_PAGE_SIZE = 50
+DIARY_PREFETCH_PAGES = 4
+
+# HTML parsing backend for profile and diary pages: "lxml" or "bs4"
+HTML_PARSER = os.environ.get("LETTERBOXD_HTML_PARSER", "lxml")
+
+# Per-request timeout (seconds) for poster lookups and downloads
+REQUEST_TIMEOUT = 10
+
+# Max concurrent poster fetches per wrapped render
+POSTER_WORKERS = 8
+
+# Shared HTTP client: pooled connections per host, token-bucket rate limit
+# (requests per second per host, 0 disables) and retries on 429/5xx
+HTTP_POOL_SIZE = 16
+HTTP_RATE_LIMIT = float(os.environ.get("LETTERBOXD_RATE_LIMIT", 8))
+HTTP_RATE_BURST = 16
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 8.0
+
+# Async API (adiary / aprofile / aposter): requests in flight per host on one event loop
+HTTP_ASYNC_CONCURRENCY = 16
+
+# Root for posters, tiles, renders and the diary store; benchmarks point it at a temp dir
+DATA_DIR = Path(os.environ.get("LETTERBOXD_DATA_DIR", Path(__file__).parent.parent.resolve()))
+
+POSTER_DIR = DATA_DIR / "posters"
 if not POSTER_DIR.is_dir():
     os.makedirs(POSTER_DIR, exist_ok=True)
 
+# Posters pre-resized to grid-tile sizes with rounded corners applied
+TILE_DIR = POSTER_DIR / "tiles"
+if not TILE_DIR.is_dir():
+    os.makedirs(TILE_DIR, exist_ok=True)
+
+# Bundled fonts (<family>-Regular.ttf / <family>-Bold.ttf) take precedence
+# over system fonts so renders look the same on every host
+FONT_DIR = Path(os.environ.get("LETTERBOXD_FONT_DIR", Path(__file__).parent.parent.resolve() / "fonts"))
+
+# In-memory budget for decoded tiles, and for the PNGs in TILE_DIR (bytes)
+TILE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+TILE_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# In-memory budget for decoded full-size posters and placeholders (bytes)
+POSTER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+RENDER_DIR = DATA_DIR / "renders"
+if not RENDER_DIR.is_dir():
+    os.makedirs(RENDER_DIR, exist_ok=True)
+
+# In-memory and on-disk budgets for finished wrapped images (bytes)
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RENDER_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+# How long a slug -> poster URL mapping is trusted before re-checking (seconds)
+POSTER_INDEX_TTL = 30 * 24 * 60 * 60
+
+# Persistent per-user diary store, re-checked for new entries at most this often (seconds)
+DIARY_DB = DATA_DIR / "diaries.sqlite3"
+DIARY_REFRESH_INTERVAL = 5 * 60
+
+# Lookups that found nothing are not retried until these expire (seconds):
+# posters Letterboxd doesn't have, usernames that 404, and failed fetches
+NEGATIVE_CACHE_DB = DATA_DIR / "negative.sqlite3"
+MISSING_POSTER_TTL = 6 * 60 * 60
+MISSING_USER_TTL = 15 * 60
+FAILED_FETCH_TTL = 60
+
+# Worker processes for the CPU-bound render stage (0 renders in-process)
+RENDER_PROCESSES = int(os.environ.get("LETTERBOXD_RENDER_PROCESSES", os.cpu_count() or 1))
+
+# Encoder settings; the preview is the small variant shown on the results page
+JPEG_QUALITY = 90
+WEBP_QUALITY = 85
+AVIF_QUALITY = 60
+PREVIEW_WIDTH = 540
+PREVIEW_QUALITY = 75
+
+# Background render jobs: worker threads and how long finished jobs stay pollable (seconds).
+# Job state is shared by all app workers through JOB_DB.
+JOB_DB = DATA_DIR / "jobs.sqlite3"
+JOB_WORKERS = 4
+JOB_TTL = 10 * 60
+
 @dataclass
 class IMG_DIM:
     width = 230
@@ -0,0 +1,235 @@
+import logging
+import time
+from datetime import date
+
+import requests
+
+from .config import DIARY_DB, DIARY_REFRESH_INTERVAL, DIARY_MAX_PAGES
+from .film import DiaryEntry
+from .shared import process_wide
+from .sqlite import thread_connections
+
+log = logging.getLogger(__name__)
+
+def _month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return start, date.fromordinal(end.toordinal() - 1)
+
+def _mutable_from():
+    # Diary entries in the current and previous month may still be added, edited or deleted
+    today = date.today()
+    return _month_bounds(*((today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)))[0]
+
+def _months_between(start, end):
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+# Bump when the table layout changes; older stores are dropped and refetched
+SCHEMA_VERSION = 3
+
+class DiaryStore:
+    """Persistent per-user diary, so returning users aren't re-scraped.
+
+    A month is fetched from Letterboxd once (month-scoped pages, or one
+    scan for a run of missing months) and then served from SQLite. Months
+    that are over are treated as immutable; for the current and previous
+    month the store is re-synced at most every `refresh_interval` seconds
+    by reading the full diary from page 1 until both months are covered
+    and a page contains an entry that is already stored. A month last
+    read before it ended is fetched once more after it has become
+    immutable, since entries may have been logged after that read.
+    """
+
+    def __init__(self, path=DIARY_DB, refresh_interval=DIARY_REFRESH_INTERVAL):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._connect = thread_connections(path)
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript(
+                    "DROP TABLE IF EXISTS entries;"
+                    "DROP TABLE IF EXISTS months;"
+                    "DROP TABLE IF EXISTS owners;"
+                    f"PRAGMA user_version = {SCHEMA_VERSION};"
+                )
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " owner TEXT NOT NULL,"
+                " watched TEXT NOT NULL,"
+                " film_slug TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " film_title TEXT NOT NULL,"
+                " film_year INTEGER,"
+                " rating INTEGER NOT NULL,"
+                " liked INTEGER NOT NULL,"
+                " rewatch INTEGER NOT NULL,"
+                " PRIMARY KEY (owner, watched, film_slug));"
+                "CREATE TABLE IF NOT EXISTS months ("
+                " owner TEXT NOT NULL,"
+                " year INTEGER NOT NULL,"
+                " month INTEGER NOT NULL,"
+                " fetched TEXT NOT NULL,"
+                " PRIMARY KEY (owner, year, month));"
+                "CREATE TABLE IF NOT EXISTS owners ("
+                " owner TEXT PRIMARY KEY,"
+                " refreshed REAL NOT NULL);"
+            )
+
+    @staticmethod
+    def _owner(user):
+        # Diary filters change what the diary contains, so they are part of the key
+        return f"{user.username.lower()}|{user.film_filter}"
+
+    @staticmethod
+    def _row(owner, seq, entry):
+        return (
+            owner, entry.date.isoformat(), entry.film_slug, seq,
+            entry.film_title, entry.film_year, entry.rating, int(entry.like), int(entry.rewatch)
+        )
+
+    @classmethod
+    def _rows(cls, owner, entries):
+        # seq is the position in diary order within one read, it orders entries of the same day
+        return [cls._row(owner, seq, entry) for seq, entry in enumerate(entries)]
+
+    def _is_known(self, conn, owner, entry):
+        row = conn.execute(
+            "SELECT rating, liked, rewatch FROM entries WHERE owner = ? AND watched = ? AND film_slug = ?",
+            (owner, entry.date.isoformat(), entry.film_slug)
+        ).fetchone()
+        return row == (entry.rating, int(entry.like), int(entry.rewatch))
+
+    def _is_complete(self, conn, owner, year, month, mutable_from):
+        row = conn.execute(
+            "SELECT fetched FROM months WHERE owner = ? AND year = ? AND month = ?",
+            (owner, year, month)
+        ).fetchone()
+        if row is None:
+            return False
+        # Mutable months are kept in sync by refresh(); an immutable month is
+        # only final if it was read after its last day
+        last = _month_bounds(year, month)[1]
+        return last >= mutable_from or row[0] > last.isoformat()
+
+    def _fetch_months(self, user, owner, months):
+        """Fetch several missing months with one diary scan over their span"""
+        start = _month_bounds(*months[0])[0]
+        end = _month_bounds(*months[-1])[1]
+        wanted = set(months)
+        entries = [e for e in user.diary_range(start, end) if (e.date.year, e.date.month) in wanted]
+        with self._connect() as conn:
+            for year, month in months:
+                first, last = _month_bounds(year, month)
+                conn.execute(
+                    "DELETE FROM entries WHERE owner = ? AND watched BETWEEN ? AND ?",
+                    (owner, first.isoformat(), last.isoformat())
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._rows(owner, entries)
+            )
+            today = date.today().isoformat()
+            conn.executemany(
+                "INSERT OR REPLACE INTO months VALUES (?, ?, ?, ?)",
+                [(owner, y, m, today) for y, m in months]
+            )
+
+    def refresh(self, user, max_pages=DIARY_MAX_PAGES):
+        """Re-sync the newest part of the diary, reading from page 1.
+
+        Reads until the pages reach back past the start of the mutable
+        months and a page contains an already-stored, unchanged entry (or
+        the diary ends). Everything newer than the oldest entry read was
+        read end to end, so the stored rows for that span are replaced in
+        one transaction: entries deleted on Letterboxd, or moved to another
+        date within the mutable months, disappear from the store as well.
+        Returns the number of pages fetched.
+        """
+        owner = self._owner(user)
+        conn = self._connect()
+        mutable_from = _mutable_from()
+        entries = []
+        pages = 0
+        known = caught_up = ended = False
+
+        for page in range(1, max_pages + 1):
+            page_entries = user.diary(page=page)
+            pages += 1
+            if not page_entries:
+                caught_up = ended = True
+                break
+            entries += page_entries
+            known = known or any(self._is_known(conn, owner, entry) for entry in page_entries)
+            if known and entries[-1].date < mutable_from:
+                caught_up = True
+                break
+
+        with conn:
+            if entries:
+                oldest = entries[-1].date
+                if ended:
+                    # The whole diary was read
+                    conn.execute("DELETE FROM entries WHERE owner = ?", (owner,))
+                else:
+                    # Entries on the oldest date read may continue on the next page, keep those
+                    conn.execute("DELETE FROM entries WHERE owner = ? AND watched > ?", (owner, oldest.isoformat()))
+                conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 self._rows(owner, entries))
+                if caught_up:
+                    # Every month after the one we stopped in was read end to end
+                    today = date.today()
+                    newer = [
+                        (owner, y, m, today.isoformat()) for y, m in _months_between(oldest, today)
+                        if (y, m) != (oldest.year, oldest.month)
+                    ]
+                    conn.executemany("INSERT OR REPLACE INTO months VALUES (?, ?, ?, ?)", newer)
+            conn.execute("INSERT OR REPLACE INTO owners VALUES (?, ?)", (owner, time.time()))
+        return pages
+
+    def diary_range(self, user, start, end) -> list[DiaryEntry]:
+        """Same result as LetterboxdUser.diary_range, served from the store"""
+        owner = self._owner(user)
+        conn = self._connect()
+
+        mutable_from = _mutable_from()
+
+        row = conn.execute("SELECT refreshed FROM owners WHERE owner = ?", (owner,)).fetchone()
+        if end >= mutable_from and row and time.time() - row[0] > self.refresh_interval:
+            try:
+                self.refresh(user)
+            except requests.exceptions.RequestException as e:
+                # Serve what is stored and try again next interval, not on every request
+                log.warning("Error refreshing diary of %s, serving stored entries: %s", user.username, e)
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO owners VALUES (?, ?)", (owner, time.time()))
+
+        # Missing months are read in one scan (year-scoped when they share a year)
+        missing = [
+            (y, m) for y, m in _months_between(start, end)
+            if not self._is_complete(conn, owner, y, m, mutable_from)
+        ]
+        if missing:
+            self._fetch_months(user, owner, missing)
+            if not row:
+                # First visit: nothing to delta against yet, start the clock now
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO owners VALUES (?, ?)", (owner, time.time()))
+
+        rows = conn.execute(
+            "SELECT watched, film_title, film_year, rating, liked, rewatch, film_slug FROM entries"
+            " WHERE owner = ? AND watched BETWEEN ? AND ?"
+            " ORDER BY watched DESC, seq ASC",
+            (owner, start.isoformat(), end.isoformat())
+        ).fetchall()
+        return [
+            DiaryEntry(date.fromisoformat(watched), title, year, rating, bool(liked), bool(rewatch), slug)
+            for watched, title, year, rating, liked, rewatch, slug in rows
+        ]
+
+@process_wide
+def get_diary_store() -> DiaryStore:
+    """Return the shared process-wide diary store"""
+    return DiaryStore()
@@ -1,174 +1,382 @@
+import asyncio
+import hashlib
+import logging
+from datetime import date
 from io import BytesIO
-from pathlib import Path
-import platform
 
+import requests
 from PIL import Image, ImageDraw, ImageFont
 from bs4 import BeautifulSoup
-import requests
 
-from .config import POSTER_DIR, IMG_DIM
+from .config import (
+    POSTER_DIR, IMG_DIM, LETTERBOXD_URL, REQUEST_TIMEOUT, MISSING_POSTER_TTL, FAILED_FETCH_TTL
+)
+from .fonts import get_font
+from .async_client import get_async_client
+from .atomic import write_atomic
+from .http_client import get_client
+from .negative_cache import get_negative_cache
+from .poster_index import get_poster_index
+from .posters import get_poster_cache
+from .single_flight import SingleFlight
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+# Month names as they appear in diary dates (both full and abbreviated)
+MONTHS = {
+    'january': 1, 'jan': 1,
+    'february': 2, 'feb': 2,
+    'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4,
+    'may': 5,
+    'june': 6, 'jun': 6,
+    'july': 7, 'jul': 7,
+    'august': 8, 'aug': 8,
+    'september': 9, 'sep': 9,
+    'october': 10, 'oct': 10,
+    'november': 11, 'nov': 11,
+    'december': 12, 'dec': 12
+}
+
+def parse_diary_date(year, month, day) -> date | None:
+    """Build a date from the diary's year, month name and day cells, None if unreadable"""
+    try:
+        return date(int(year), MONTHS[month.strip().lower()], int(day))
+    except (ValueError, KeyError, AttributeError):
+        return None
+
+def parse_rating(value) -> int:
+    """Star rating text ("★★★½") as half stars (7), 0 when unrated"""
+    return value.count('★') * 2 + value.count('½') if value else 0
+
+# Concurrent renders that need the same poster share one download
+_downloads = SingleFlight("poster_download")
+
+def placeholder_image(title, year):
+    """Grey poster-sized stand-in with the title, kept in the shared poster cache.
+
+    The returned image is shared between callers and must not be modified.
+    """
+    return get_poster_cache().get_or_create(("placeholder", title, year), lambda: _draw_placeholder(title, year))
+
+def _draw_placeholder(title, year):
+    img = Image.new(
+        mode="RGB",
+        size=(IMG_DIM.width, IMG_DIM.height),
+        color="gray"
+    )
+
+    try:
+        font = get_font(16, family="arial")
+        film_title = f"{title}"
+        if year:
+            film_title += f" ({year})"
+
+        # Word wrap text to fit image
+        words = film_title.split()
+        lines = []
+        current_line = ""
+
+        for word in words:
+            test_line = current_line + " " + word if current_line else word
+            bbox = font.getbbox(test_line)
+            if bbox[2] <= IMG_DIM.width - 20:  # 10px margin on each side
+                current_line = test_line
+            else:
+                if current_line:
+                    lines.append(current_line)
+                    current_line = word
+                else:
+                    lines.append(word)
+
+        if current_line:
+            lines.append(current_line)
+
+        # Limit to max 3 lines
+        lines = lines[:3]
+
+        # Calculate starting y position to center text
+        line_height = font.getbbox("A")[3] + 5
+        total_height = len(lines) * line_height
+        start_y = (IMG_DIM.height - total_height) // 2
+
+        draw = ImageDraw.Draw(img)
+        for i, line in enumerate(lines):
+            bbox = font.getbbox(line)
+            x = (IMG_DIM.width - bbox[2]) // 2
+            y = start_y + i * line_height
+            draw.text((x, y), line, fill="white", font=font)
+
+    except Exception as e:
+        log.warning("Error creating text for placeholder: %s", e)
+
+    return img
+
+def placeholder_key(title, year) -> str:
+    """Tile cache key for a placeholder, standing in for the film slug"""
+    digest = hashlib.sha1(f"{title}|{year}".encode("utf-8")).hexdigest()[:16]
+    return f"placeholder-{digest}"
 
 class Film:
+    __slots__ = (
+        "film_title", "film_year", "film_slug",
+        "_poster_url", "poster_path", "poster_is_placeholder"
+    )
+
     def __init__(self, film_title, film_year, film_slug):
         self.film_title: str = film_title
         self.film_year: int | None = film_year
         self.film_slug: str = film_slug
         self._poster_url: str | None = None
-        self._poster_img = None
+        self.poster_path: str | None = None  # Local poster file once cached
+        self.poster_is_placeholder = False
 
     def _get_font(self, size=24):
-        """Get appropriate font based on operating system"""
-        try:
-            system = platform.system()
-            if system == "Windows":
-                return ImageFont.truetype("arial.ttf", size=size)
-            elif system == "Darwin":  # macOS
-                return ImageFont.truetype("/System/Library/Fonts/Arial.ttf", size=size)
-            else:  # Linux and others
-                # Try common font paths
-                font_paths = [
-                    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-                    "/usr/share/fonts/TTF/DejaVuSans.ttf", 
-                    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"
-                ]
-                for font_path in font_paths:
-                    if Path(font_path).exists():
-                        return ImageFont.truetype(font_path, size=size)
-                # Fallback to default font
-                return ImageFont.load_default()
-        except Exception:
-            return ImageFont.load_default()
+        """Get Arial (or the closest available) font from the shared registry"""
+        return get_font(size, family="arial")
 
     @property
     def poster_url(self) -> str:
-        if self._poster_url is not None:
+        return self.get_poster_url()
+
+    @property
+    def poster_image(self):
+        return self.get_poster_image()
+
+    def _known_poster_url(self):
+        """Poster URL from this instance or the index, None if it must be looked up"""
+        if self._poster_url is None:
+            known = get_poster_index().get(self.film_slug)
+            metrics.cache_lookup("poster_index", known is not None)
+            if known:
+                self._poster_url = known[0]
+        return self._poster_url
+
+    def _local_poster_url(self):
+        """(poster URL, whether it still has to be looked up) from the index and negative cache"""
+        poster_url = self._known_poster_url()
+        return poster_url, poster_url is None and not get_negative_cache().get("poster", self.film_slug)
+
+    def _poster_lookup_url(self):
+        return f"{LETTERBOXD_URL}/ajax/poster/film/{self.film_slug}/std/{IMG_DIM.width}x{IMG_DIM.height}/"
+
+    def _read_poster_lookup(self, html):
+        """Poster URL from the lookup response, remembered in the index or as a miss"""
+        soup = BeautifulSoup(html, "html.parser")
+        img_tag = soup.find("img", class_="image")
+        if img_tag and img_tag.get("src"):
+            self._poster_url = img_tag["src"]
+            get_poster_index().put(self.film_slug, self._poster_url)
             return self._poster_url
-        
+        log.info("No poster found for %s", self.film_slug)
+        get_negative_cache().put("poster", self.film_slug, "no poster", MISSING_POSTER_TTL)
+        return None
+
+    def get_poster_url(self, timeout=REQUEST_TIMEOUT) -> str:
+        poster_url, lookup = self._local_poster_url()
+        if not lookup:
+            return poster_url
+
         try:
-            print(f"Fetching poster url for {self.film_slug}")
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            res = requests.get(
-                f"https://letterboxd.com/ajax/poster/film/{self.film_slug}/std/{IMG_DIM.width}x{IMG_DIM.height}/",
-                headers=headers,
-                timeout=10
-            )
-            res.raise_for_status()
-            soup = BeautifulSoup(res.text, "html.parser")
-            img_tag = soup.find("img", class_="image")
-            if img_tag and img_tag.get("src"):
-                self._poster_url = img_tag["src"]
-                return self._poster_url
-            else:
-                print(f"No poster found for {self.film_slug}")
-                return None
+            log.debug("Fetching poster url for %s", self.film_slug)
+            with metrics.stage("poster_lookup"):
+                res = get_client().get(self._poster_lookup_url(), timeout=timeout)
+                return self._read_poster_lookup(res.text)
         except Exception as e:
-            print(f"Error fetching poster URL for {self.film_slug}: {e}")
+            log.warning("Error fetching poster URL for %s: %s", self.film_slug, e)
+            self._remember_failure(e)
             return None
 
-    @property
-    def poster_image(self):
-        if self._poster_img is not None:
-            return self._poster_img
-
-        # Check if image is available locally
-        poster_url = self.poster_url
-        if poster_url:
-            img_filename = f"{self.film_slug}_{poster_url[-10:]}.jpg"
-            img_path = POSTER_DIR / img_filename
-            
-            if img_path.is_file():
-                print(f"Image for {self.film_slug} is available locally")
-                try:
-                    self._poster_img = Image.open(img_path)
-                    return self._poster_img
-                except Exception as e:
-                    print(f"Error opening local image: {e}")
-
-            # Download image
-            try:
-                print(f"Fetching image from {poster_url}")
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                res = requests.get(poster_url, headers=headers, timeout=10)
-                res.raise_for_status()
-                
-                if res.headers.get("Content-Type", "").startswith("image/"):
-                    img = Image.open(BytesIO(res.content))
-                    img = img.convert('RGB')  # Ensure RGB format
-                    img.save(img_path, "JPEG")
-                    self._poster_img = img
-                    return img
-            except Exception as e:
-                print(f"Error downloading image for {self.film_slug}: {e}")
-
-        # Create placeholder image
-        print(f"Creating placeholder for {self.film_slug}")
-        img = Image.new(
-            mode="RGB",
-            size=(IMG_DIM.width, IMG_DIM.height),
-            color="gray"
-        )
-        
+    async def aposter_url(self, timeout=REQUEST_TIMEOUT) -> str:
+        """Async version of get_poster_url.
+
+        SQLite lookups and HTML parsing run in the loop's default executor,
+        so other fetches on the loop keep going meanwhile.
+        """
+        poster_url, lookup = await asyncio.to_thread(self._local_poster_url)
+        if not lookup:
+            return poster_url
+
         try:
-            font = self._get_font(size=16)
-            film_title = f"{self.film_title}"
-            if self.film_year: 
-                film_title += f" ({self.film_year})"
-            
-            # Word wrap text to fit image
-            words = film_title.split()
-            lines = []
-            current_line = ""
-            
-            for word in words:
-                test_line = current_line + " " + word if current_line else word
-                bbox = font.getbbox(test_line)
-                if bbox[2] <= IMG_DIM.width - 20:  # 10px margin on each side
-                    current_line = test_line
-                else:
-                    if current_line:
-                        lines.append(current_line)
-                        current_line = word
-                    else:
-                        lines.append(word)
-            
-            if current_line:
-                lines.append(current_line)
-            
-            # Limit to max 3 lines
-            lines = lines[:3]
-            
-            # Calculate starting y position to center text
-            line_height = font.getbbox("A")[3] + 5
-            total_height = len(lines) * line_height
-            start_y = (IMG_DIM.height - total_height) // 2
-            
-            draw = ImageDraw.Draw(img)
-            for i, line in enumerate(lines):
-                bbox = font.getbbox(line)
-                x = (IMG_DIM.width - bbox[2]) // 2
-                y = start_y + i * line_height
-                draw.text((x, y), line, fill="white", font=font)
-                
+            log.debug("Fetching poster url for %s", self.film_slug)
+            with metrics.stage("poster_lookup"):
+                res = await get_async_client().get(self._poster_lookup_url(), timeout=timeout)
+                return await asyncio.to_thread(self._read_poster_lookup, res.text)
+        except Exception as e:
+            log.warning("Error fetching poster URL for %s: %s", self.film_slug, e)
+            await asyncio.to_thread(self._remember_failure, e)
+            return None
+
+    def _remember_failure(self, error):
+        """Skip this poster for a while: long for a 404, briefly for anything else"""
+        missing = isinstance(error, requests.HTTPError) and getattr(error.response, "status_code", None) == 404
+        ttl = MISSING_POSTER_TTL if missing else FAILED_FETCH_TTL
+        get_negative_cache().put("poster", self.film_slug, str(error)[:200], ttl)
+
+    def _store_poster(self, res, poster_url, img_filename):
+        """Decode a downloaded poster and save it to POSTER_DIR; returns True once it is on disk"""
+        if not res.headers.get("Content-Type", "").startswith("image/"):
+            log.warning("Poster for %s is not an image: %s", self.film_slug, res.headers.get("Content-Type"))
+            get_negative_cache().put("poster", self.film_slug, "not an image", MISSING_POSTER_TTL)
+            return False
+
+        # The decoded image is only needed to re-encode it, it is released on return
+        with metrics.stage("poster_decode"), Image.open(BytesIO(res.content)) as img:
+            rgb = img.convert('RGB')
+            write_atomic(POSTER_DIR / img_filename, lambda f: rgb.save(f, "JPEG"))
+        get_poster_index().put(self.film_slug, poster_url, img_filename)
+        return True
+
+    def _download_poster(self, poster_url, img_filename, timeout):
+        """Download, decode and store a poster; returns True on success"""
+        try:
+            log.debug("Fetching image from %s", poster_url)
+            with metrics.stage("poster_download"):
+                res = get_client().get(poster_url, timeout=timeout)
+            return self._store_poster(res, poster_url, img_filename)
+        except Exception as e:
+            log.warning("Error downloading image for %s: %s", self.film_slug, e)
+            self._remember_failure(e)
+            return False
+
+    async def _adownload_poster(self, poster_url, img_filename, timeout):
+        try:
+            log.debug("Fetching image from %s", poster_url)
+            with metrics.stage("poster_download"):
+                res = await get_async_client().get(poster_url, timeout=timeout)
+            # Decoding, re-encoding and the fsync'd write would stall the loop
+            return await asyncio.to_thread(self._store_poster, res, poster_url, img_filename)
+        except Exception as e:
+            log.warning("Error downloading image for %s: %s", self.film_slug, e)
+            await asyncio.to_thread(self._remember_failure, e)
+            return False
+
+    def _find_poster_file(self, poster_url, img_filename):
+        """Use a poster file that is already on disk; False if there is none"""
+        img_path = POSTER_DIR / img_filename
+        if not img_path.is_file():
+            return False
+        self._poster_url = poster_url
+        self.poster_path = str(img_path)
+        metrics.cache_lookup("poster_file", True)
+        return True
+
+    def _index_poster_file(self, poster_url, img_filename):
+        """Use and index a poster file that is already on disk; False if there is none"""
+        if not self._find_poster_file(poster_url, img_filename):
+            return False
+        get_poster_index().put(self.film_slug, poster_url, img_filename)
+        return True
+
+    def _cached_poster(self):
+        """Resolve the poster from disk without any request; returns (resolved, poster URL to fetch)"""
+        if self.poster_path or self.poster_is_placeholder:
+            return True, None
+
+        # A known slug points straight at its local file, no lookup needed
+        known = get_poster_index().get(self.film_slug)
+        if known and known[1] and self._find_poster_file(known[0], known[1]):
+            return True, None
+
+        if not known:
+            return False, None
+        if get_negative_cache().get("poster", self.film_slug):
+            # Indexed URL whose download failed recently, don't retry it yet
+            self._use_placeholder()
+            return True, None
+        self._poster_url = known[0]
+        return False, known[0]
+
+    def _poster_filename(self, poster_url):
+        return f"{self.film_slug}_{poster_url[-10:]}.jpg"
+
+    def _use_placeholder(self):
+        log.info("Creating placeholder for %s", self.film_slug)
+        self.poster_is_placeholder = True
+
+    def resolve_local_poster(self) -> bool:
+        """Resolve the poster from disk and the caches only; False when a request is still needed"""
+        return self._cached_poster()[0]
+
+    def fetch_poster(self, timeout=REQUEST_TIMEOUT) -> bool:
+        """Make the poster available as `poster_path` without decoding it.
+
+        Falls back to a placeholder; returns False when that happened.
+        """
+        resolved, poster_url = self._cached_poster()
+        if not resolved:
+            poster_url = poster_url or self.get_poster_url(timeout=timeout)
+            if poster_url:
+                img_filename = self._poster_filename(poster_url)
+                if not self._index_poster_file(poster_url, img_filename):
+                    # Download image, once for all films currently waiting on this URL
+                    metrics.cache_lookup("poster_file", False)
+                    if _downloads.do(poster_url, self._download_poster, poster_url, img_filename, timeout):
+                        self.poster_path = str(POSTER_DIR / img_filename)
+            if not self.poster_path:
+                self._use_placeholder()
+        return not self.poster_is_placeholder
+
+    async def afetch_poster(self, timeout=REQUEST_TIMEOUT) -> bool:
+        """Async version of fetch_poster; disk and SQLite work runs off the event loop"""
+        resolved, poster_url = await asyncio.to_thread(self._cached_poster)
+        if not resolved:
+            poster_url = poster_url or await self.aposter_url(timeout=timeout)
+            if poster_url:
+                img_filename = self._poster_filename(poster_url)
+                if not await asyncio.to_thread(self._index_poster_file, poster_url, img_filename):
+                    # Identical downloads in flight on this loop are shared by the async client
+                    metrics.cache_lookup("poster_file", False)
+                    if await self._adownload_poster(poster_url, img_filename, timeout):
+                        self.poster_path = str(POSTER_DIR / img_filename)
+            if not self.poster_path:
+                self._use_placeholder()
+        return not self.poster_is_placeholder
+
+    def _decoded_poster(self):
+        if self.poster_is_placeholder:
+            return placeholder_image(self.film_title, self.film_year)
+        try:
+            return get_poster_cache().load(self.poster_path)
         except Exception as e:
-            print(f"Error creating text for placeholder: {e}")
+            log.warning("Error opening local image: %s", e)
+            self.poster_path = None
+            self._use_placeholder()
+            return placeholder_image(self.film_title, self.film_year)
+
+    def get_poster_image(self, timeout=REQUEST_TIMEOUT):
+        """Decoded poster (or placeholder) from the shared poster cache; must not be modified"""
+        self.fetch_poster(timeout=timeout)
+        return self._decoded_poster()
 
-        self._poster_img = img
-        return img
+    async def aposter(self, timeout=REQUEST_TIMEOUT):
+        """Async version of get_poster_image"""
+        await self.afetch_poster(timeout=timeout)
+        return await asyncio.to_thread(self._decoded_poster)
 
     def __repr__(self):
         return f"Film(film_title={self.film_title}, film_year={self.film_year})"
 
 class DiaryEntry(Film):
+    """One diary row, parsed once at scrape time.
+
+    `date` is a datetime.date and `rating` is in half stars (0-10, 0 when
+    unrated), so filtering and stats are plain comparisons and sums.
+    """
+    __slots__ = ("date", "rating", "like", "rewatch")
+
     def __init__(self, date, film_title, film_year, rating, like, rewatch, film_slug):
         super().__init__(film_title, film_year, film_slug)
-        self.date = date
-        self.rating = rating
-        self.like = like
-        self.rewatch = rewatch
+        self.date: date = date
+        self.rating: int = rating
+        self.like: bool = like
+        self.rewatch: bool = rewatch
+
+    @property
+    def stars(self) -> str:
+        """Rating as Letterboxd displays it, e.g. "★★★½" """
+        return "★" * (self.rating // 2) + ("½" if self.rating % 2 else "")
 
     def __repr__(self):
         return f"DiaryEntry(date={self.date}, film_title={self.film_title})"
@@ -0,0 +1,126 @@
+import logging
+import platform
+import threading
+from pathlib import Path
+
+from PIL import ImageFont
+
+from .config import FONT_DIR
+from .shared import process_wide
+
+log = logging.getLogger(__name__)
+
+# Candidate font files per (family, bold), tried in order after FONT_DIR
+SYSTEM_FONTS = {
+    "Windows": {
+        ("helvetica", False): ["HelveticaNeue.ttf", "helvetica.ttf", "arial.ttf"],
+        ("helvetica", True): ["HelveticaNeue-Bold.ttf", "helveticab.ttf", "arialbd.ttf"],
+        ("arial", False): ["arial.ttf"],
+        ("arial", True): ["arialbd.ttf"],
+    },
+    "Darwin": {
+        ("helvetica", False): [
+            "/System/Library/Fonts/Helvetica.ttc",
+            "/System/Library/Fonts/HelveticaNeue.ttc",
+            "/System/Library/Fonts/Arial.ttf"
+        ],
+        ("helvetica", True): [
+            "/System/Library/Fonts/Helvetica.ttc",
+            "/System/Library/Fonts/HelveticaNeue.ttc",
+            "/System/Library/Fonts/Arial.ttf"
+        ],
+        ("arial", False): ["/System/Library/Fonts/Arial.ttf"],
+        ("arial", True): ["/System/Library/Fonts/Arial.ttf"],
+    },
+    "Linux": {
+        ("helvetica", False): [
+            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+            "/usr/share/fonts/TTF/DejaVuSans.ttf"
+        ],
+        ("helvetica", True): [
+            "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+            "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf"
+        ],
+        ("arial", False): [
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+            "/usr/share/fonts/TTF/DejaVuSans.ttf",
+            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"
+        ],
+        ("arial", True): [
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+            "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+            "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"
+        ],
+    },
+}
+
+class FontRegistry:
+    """Resolves font files once per process and memoizes loaded fonts.
+
+    Fonts in `font_dir` named `<family>-Regular.ttf` / `<family>-Bold.ttf`
+    (or .otf/.ttc) win over system fonts, so a bundled directory gives the
+    same output on every host. Safe to share between threads.
+    """
+
+    def __init__(self, font_dir=FONT_DIR, system=None):
+        self.font_dir = Path(font_dir) if font_dir else None
+        self.system = system or platform.system()
+        self._paths = {}   # (family, bold) -> path or None for the default font
+        self._fonts = {}   # (family, bold, size) -> font
+        self._lock = threading.Lock()
+
+    def _candidates(self, family, bold):
+        if self.font_dir and self.font_dir.is_dir():
+            weight = "Bold" if bold else "Regular"
+            for ext in (".ttf", ".otf", ".ttc"):
+                yield str(self.font_dir / f"{family}-{weight}{ext}")
+        system_fonts = SYSTEM_FONTS.get(self.system, SYSTEM_FONTS["Linux"])
+        yield from system_fonts.get((family, bold), [])
+
+    def _resolve(self, family, bold):
+        for candidate in self._candidates(family, bold):
+            # Bare names (Windows) are looked up by FreeType, so only skip
+            # absolute paths that are known to be missing
+            if Path(candidate).is_absolute() and not Path(candidate).exists():
+                continue
+            try:
+                ImageFont.truetype(candidate, size=10)
+                return candidate
+            except Exception:
+                continue
+        log.warning("No font found for %s (bold=%s), using default", family, bold)
+        return None
+
+    def get(self, size, bold=False, family="helvetica"):
+        key = (family, bold, size)
+        font = self._fonts.get(key)
+        if font is not None:
+            return font
+
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                return font
+
+            if (family, bold) not in self._paths:
+                self._paths[(family, bold)] = self._resolve(family, bold)
+            path = self._paths[(family, bold)]
+
+            try:
+                font = ImageFont.truetype(path, size=size) if path else ImageFont.load_default()
+            except Exception as e:
+                log.warning("Font loading error: %s", e)
+                font = ImageFont.load_default()
+
+            self._fonts[key] = font
+            return font
+
+@process_wide
+def _registry() -> FontRegistry:
+    return FontRegistry()
+
+def get_font(size, bold=False, family="helvetica"):
+    """Load a font through the shared process-wide registry"""
+    return _registry().get(size, bold=bold, family=family)
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    HTTP_POOL_SIZE,
+    HTTP_RATE_LIMIT,
+    HTTP_RATE_BURST,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+)
+from .shared import process_wide
+from .single_flight import SingleFlight
+from . import metrics
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def backoff(attempt, response=None):
+    """Seconds to wait before retry `attempt`, honouring a numeric Retry-After"""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), HTTP_BACKOFF_MAX)
+    delay = HTTP_BACKOFF_BASE * (2 ** attempt)
+    return min(delay * random.uniform(0.5, 1.5), HTTP_BACKOFF_MAX)
+
+class TokenBucket:
+    """Token bucket, `rate` tokens per second up to `burst`; acquire() blocks, acquire_async() awaits"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available, else return seconds until there is one"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while (wait := self._take()) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        if not self.rate:
+            return
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+class HttpClient:
+    """Process-wide HTTP layer shared by every scraper call.
+
+    Keeps one pooled keep-alive session, rate limits each host with a token
+    bucket, retries 429/5xx responses and connection errors with jittered
+    exponential backoff, and records per-host latency counters. Identical
+    GETs made while one is already in flight wait for it instead of going
+    out again.
+    """
+
+    def __init__(self, rate=HTTP_RATE_LIMIT, burst=HTTP_RATE_BURST,
+                 max_retries=HTTP_MAX_RETRIES, pool_size=HTTP_POOL_SIZE):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._buckets = {}
+        self._stats = defaultdict(HostStats)
+        self._flights = SingleFlight("http")
+        self._lock = threading.Lock()
+
+    def bucket(self, host):
+        """The host's token bucket; the async client draws from the same one"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def _record(self, host, elapsed_ms, error=False, retry=False):
+        with self._lock:
+            stats = self._stats[host]
+            stats.requests += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    def get(self, url, **kwargs):
+        """GET with rate limiting and retries, raises for non-2xx responses.
+
+        Concurrent calls for the same URL and cookies (the same poster
+        lookup, image or diary page) share one request and its response.
+        """
+        cookies = kwargs.get("cookies")
+        key = (url, tuple(sorted(cookies.items())) if cookies else None)
+        return self._flights.do(key, self._get, url, **kwargs)
+
+    def _get(self, url, **kwargs):
+        host = urlsplit(url).netloc
+        bucket = self.bucket(host)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._record(host, (time.perf_counter() - start) * 1000, error=True, retry=not last_attempt)
+                if last_attempt:
+                    raise
+                time.sleep(backoff(attempt))
+                continue
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                self._record(host, elapsed_ms, error=True, retry=True)
+                time.sleep(backoff(attempt, response))
+                continue
+
+            self._record(host, elapsed_ms, error=not response.ok)
+            response.raise_for_status()
+            metrics.inc(metrics.DOWNLOADED_BYTES, len(response.content), host=host)
+            return response
+
+    def stats(self):
+        """Per-host latency counters"""
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._stats.items()}
+
+@process_wide
+def get_client() -> HttpClient:
+    """Return the shared process-wide client"""
+    return HttpClient()
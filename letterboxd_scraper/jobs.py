@@ -0,0 +1,135 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .config import JOB_DB, JOB_WORKERS, JOB_TTL
+from .sqlite import thread_connections
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+@dataclass
+class Job:
+    id: str
+    key: str
+    status: str = QUEUED
+    result: object = None
+    error: str | None = None
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+    timings: dict | None = None  # RequestMetrics.as_dict() of the run
+
+    def as_dict(self):
+        data = {"job_id": self.id, "status": self.status, "error": self.error}
+        if self.status in (DONE, FAILED) and self.timings is not None:
+            data["timings"] = self.timings
+        return data
+
+class JobQueue:
+    """Background job runner with de-duplication of identical in-flight jobs.
+
+    Job state lives in SQLite, so with several gunicorn workers any of them
+    can answer a poll; the job itself runs in the worker that accepted it.
+    Submitting a key that is already queued or running (in any worker)
+    returns the existing job instead of starting another. Results must be
+    JSON-serializable. Jobs are kept for `ttl` seconds after they finish;
+    unfinished jobs older than that are assumed lost with their worker.
+    """
+
+    def __init__(self, path=JOB_DB, max_workers=JOB_WORKERS, ttl=JOB_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._connect = thread_connections(path)
+        with self._connect() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " created REAL NOT NULL,"
+                " finished REAL,"
+                " timings TEXT);"
+                # At most one unfinished job per key, across processes
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_in_flight ON jobs (key) WHERE finished IS NULL;"
+            )
+
+    def _expire(self, conn):
+        cutoff = time.time() - self.ttl
+        conn.execute(
+            "DELETE FROM jobs WHERE (finished IS NOT NULL AND finished < ?) OR (finished IS NULL AND created < ?)",
+            (cutoff, cutoff)
+        )
+
+    def _update(self, job_id, **values):
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in values)} WHERE id = ?",
+                (*values.values(), job_id)
+            )
+
+    def _run(self, job, fn, args, kwargs):
+        self._update(job.id, status=RUNNING)
+        collected, token = metrics.start_request()
+        try:
+            with metrics.stage("job"):
+                result = json.dumps(fn(*args, **kwargs))
+            status, error = DONE, None
+        except Exception as e:
+            log.exception("Job %s failed: %s", job.id, e)
+            result, status, error = None, FAILED, str(e)
+        finally:
+            metrics.end_request(token)
+        self._update(
+            job.id, status=status, result=result, error=error,
+            finished=time.time(), timings=json.dumps(collected.as_dict())
+        )
+
+    def submit(self, key, fn, *args, **kwargs) -> Job:
+        key = json.dumps(key)
+        job = Job(id=uuid.uuid4().hex, key=key)
+        conn = self._connect()
+        try:
+            with conn:
+                self._expire(conn)
+                conn.execute(
+                    "INSERT INTO jobs (id, key, status, created) VALUES (?, ?, ?, ?)",
+                    (job.id, job.key, job.status, job.created)
+                )
+        except sqlite3.IntegrityError:
+            # Already queued or running, possibly in another worker
+            row = conn.execute("SELECT id FROM jobs WHERE key = ? AND finished IS NULL", (key,)).fetchone()
+            existing = self.get(row[0]) if row else None
+            if existing is not None:
+                return existing
+            return self.submit(json.loads(key), fn, *args, **kwargs)
+
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id) -> Job | None:
+        row = self._connect().execute(
+            "SELECT id, key, status, result, error, created, finished, timings FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job_id, key, status, result, error, created, finished, timings = row
+        if finished is None and created < time.time() - self.ttl:
+            return None
+        return Job(
+            id=job_id, key=key, status=status, error=error, created=created, finished=finished,
+            result=json.loads(result) if result is not None else None,
+            timings=json.loads(timings) if timings is not None else None
+        )
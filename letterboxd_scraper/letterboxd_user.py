@@ -1,23 +1,50 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
 import requests
-from bs4 import BeautifulSoup
-import time
 
-from .film import Film, DiaryEntry
+from .config import (
+    LETTERBOXD_URL, DIARY_MAX_PAGES, DIARY_PAGE_SIZE, DIARY_PREFETCH_PAGES, MISSING_USER_TTL
+)
+from .film import DiaryEntry
+from .async_client import get_async_client
+from .http_client import get_client
+from .negative_cache import get_negative_cache
+from .parsing import parse_diary_listing, parse_profile_page
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+NOT_LOADED = "not_loaded"
+LOADED = "loaded"
+FAILED = "failed"
+
+# Profile fields by the part of the profile page they are parsed from
+STAT_FIELDS = ("total_films", "total_films_this_year", "lists", "following", "followers")
+PROFILE_FIELDS = {
+    "profile_name": "header",
+    "pro": "header",
+    **dict.fromkeys(STAT_FIELDS, "stats"),
+    "bio": "bio",
+    "four_faves": "favourites",
+}
+
+class UserNotFoundError(LookupError):
+    """Letterboxd has no user by this name (its pages 404)"""
 
 class LetterboxdUser:
     def __init__(self, username: str, diary_filters: dict={}):
         self.username = username
-        self.profile_url = f"https://letterboxd.com/{self.username}"
-        self._profile_name = None
-        self._total_films = None
-        self._total_films_this_year = None
-        self._lists = None
-        self._following = None
-        self._followers = None
-        self._pro = None
-        self._bio = None
+        self.profile_url = f"{LETTERBOXD_URL}/{self.username}"
+        self._profile = {}        # field -> value, for loaded groups only
+        self._profile_state = {}  # group -> LOADED or FAILED
+        self._profile_html = None
+        self.profile_error = None
         self._diary = {}
-        self._four_faves = None
+        self._page_counts = {}  # (year, month) -> pages in that diary, from its pagination
         self.diary_filters = {
             "only-films": False,
             "hide-shorts": False,
@@ -25,162 +52,151 @@ class LetterboxdUser:
             "hide-docs": False
         } | diary_filters
 
+    def _check_known_missing(self):
+        if get_negative_cache().get("user", self.username.lower()):
+            raise UserNotFoundError(f"Letterboxd user '{self.username}' not found")
+
+    def _request_failed(self, url, error):
+        """Raise UserNotFoundError (and remember it) for a 404, log anything else"""
+        response = getattr(error, "response", None)
+        if isinstance(error, requests.exceptions.HTTPError) and response is not None and response.status_code == 404:
+            log.info("User %s not found", self.username)
+            get_negative_cache().put("user", self.username.lower(), "not found", MISSING_USER_TTL)
+            raise UserNotFoundError(f"Letterboxd user '{self.username}' not found") from error
+        log.warning("Error making request to %s: %s", url, error)
+
     def _make_request(self, url, cookies=None):
-        """Make request with proper headers and error handling"""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-        
+        """Make request through the shared HTTP client.
+
+        A 404 means the user doesn't exist; that is remembered for
+        MISSING_USER_TTL seconds and raised as UserNotFoundError without
+        asking Letterboxd again.
+        """
+        self._check_known_missing()
         try:
-            response = requests.get(url, headers=headers, cookies=cookies, timeout=15)
-            response.raise_for_status()
-            return response
+            return get_client().get(url, cookies=cookies, timeout=15)
         except requests.exceptions.RequestException as e:
-            print(f"Error making request to {url}: {e}")
+            self._request_failed(url, e)
             raise
 
+    async def _amake_request(self, url, cookies=None):
+        """Async version of _make_request, through the event loop's client"""
+        self._check_known_missing()
+        try:
+            return await get_async_client().get(url, cookies=cookies, timeout=15)
+        except requests.exceptions.RequestException as e:
+            self._request_failed(url, e)
+            raise
+
+    def _profile_field(self, name):
+        group = PROFILE_FIELDS[name]
+        if group not in self._profile_state:
+            self.load_profile(name)
+        return self._profile.get(name)
+
     @property
     def profile_name(self):
-        if self._profile_name is not None:
-            return self._profile_name
-        self.get_profile_info()
-        return self._profile_name
+        return self._profile_field("profile_name")
 
     @property
     def total_films(self):
-        if self._total_films is not None:
-            return self._total_films
-        self.get_profile_info()
-        return self._total_films
+        return self._profile_field("total_films")
 
     @property
     def total_films_this_year(self):
-        if self._total_films_this_year is not None:
-            return self._total_films_this_year
-        self.get_profile_info()
-        return self._total_films_this_year
+        return self._profile_field("total_films_this_year")
 
     @property
     def lists(self):
-        if self._lists is not None:
-            return self._lists
-        self.get_profile_info()
-        return self._lists
+        return self._profile_field("lists")
 
     @property
     def following(self):
-        if self._following is not None:
-            return self._following
-        self.get_profile_info()
-        return self._following
+        return self._profile_field("following")
 
     @property
     def followers(self):
-        if self._followers is not None:
-            return self._followers
-        self.get_profile_info()
-        return self._followers
+        return self._profile_field("followers")
 
     @property
     def pro(self):
-        if self._pro is not None:
-            return self._pro
-        self.get_profile_info()
-        return self._pro
+        return self._profile_field("pro")
 
     @property
     def bio(self):
-        if self._bio is not None:
-            return self._bio
-        self.get_profile_info()
-        return self._bio
+        return self._profile_field("bio")
 
     @property
     def four_faves(self):
-        if self._four_faves is not None:
-            return self._four_faves
-        self.get_profile_info()
-        return self._four_faves
+        return self._profile_field("four_faves")
 
-    def get_profile_info(self):
-        print("Fetching profile information...")
+    def profile_state(self, field) -> str:
+        """NOT_LOADED, LOADED or FAILED for a profile field's group"""
+        return self._profile_state.get(PROFILE_FIELDS[field], NOT_LOADED)
+
+    def _pending_groups(self, fields):
+        groups = dict.fromkeys(PROFILE_FIELDS[field] for field in fields or PROFILE_FIELDS)
+        return [group for group in groups if group not in self._profile_state]
+
+    def _read_profile(self, groups):
+        with metrics.stage("profile_parse"):
+            profile = parse_profile_page(self._profile_html, self.username, groups=groups)
+        if "statistics" in profile:
+            # Films, this year, lists, following, followers; missing ones count as 0
+            statistics = (profile.pop("statistics") + [0] * 5)[:5]
+            profile.update(zip(STAT_FIELDS, statistics))
+        self._profile.update(profile)
+        self._profile_state.update(dict.fromkeys(groups, LOADED))
+
+    def _profile_failed(self, groups, error):
+        # Failed fields read as None rather than defaults that look like real values.
+        # Without the page every group has failed, so none of them refetches it.
+        log.warning("Error fetching profile info for %s: %s", self.username, error)
+        if self._profile_html is None:
+            groups = self._pending_groups(())
+        self.profile_error = error
+        self._profile_state.update(dict.fromkeys(groups, FAILED))
+
+    def load_profile(self, *fields):
+        """Load the groups holding these profile fields (all by default).
+
+        The profile page is fetched at most once per user and each group is
+        parsed only when first needed. A failed load leaves its fields None
+        with profile_state() FAILED and the error in `profile_error`.
+        """
+        groups = self._pending_groups(fields)
+        if not groups:
+            return
+        try:
+            if self._profile_html is None:
+                log.debug("Fetching profile information for %s", self.username)
+                with metrics.stage("profile"):
+                    self._profile_html = self._make_request(self.profile_url).text
+            self._read_profile(groups)
+        except Exception as e:
+            self._profile_failed(groups, e)
+
+    async def aprofile(self, *fields):
+        """Async version of load_profile"""
+        groups = self._pending_groups(fields)
+        if not groups:
+            return
         try:
-            res = self._make_request(self.profile_url)
-            soup = BeautifulSoup(res.text, "html.parser")
-            
-            # Profile name
-            profile_name_elem = soup.find("div", class_="profile-name-wrap")
-            if profile_name_elem and profile_name_elem.h1:
-                profile_name = profile_name_elem.h1.text.strip()
-            else:
-                profile_name = self.username
-            
-            # Profile statistics
-            profile_statistics = []
-            for stat in soup.find_all("h4", "profile-statistic"):
-                stat_text = stat.text
-                digits = "".join([c for c in stat_text if c.isdigit()])
-                profile_statistics.append(int(digits) if digits else 0)
-            
-            # Ensure we have all 5 statistics (films, this year, lists, following, followers)
-            while len(profile_statistics) < 5:
-                profile_statistics.append(0)
-            
-            # Pro status
-            pro = soup.find("span", class_="badge") is not None
-            
-            # Bio
-            bio_elem = soup.find("section", id="person-bio") or soup.find("div", class_="bio")
-            bio_text = ""
-            if bio_elem and bio_elem.div:
-                bio_text = bio_elem.div.get_text("\n", strip=True)
-            
-            # Four favorites
-            ffaves = []
-            for f in soup.find_all("li", class_="favourite-film-poster-container"):
-                if f.div and f.div.get("data-film-slug"):
-                    img_elem = f.div.find("img")
-                    film_title = img_elem.get("alt", "Unknown") if img_elem else "Unknown"
-                    ffaves.append(
-                        Film(
-                            film_title=film_title,
-                            film_year=None,
-                            film_slug=f.div["data-film-slug"]
-                        )
-                    )
-            
-            self._profile_name = profile_name
-            self._total_films = profile_statistics[0] if len(profile_statistics) > 0 else 0
-            self._total_films_this_year = profile_statistics[1] if len(profile_statistics) > 1 else 0
-            self._lists = profile_statistics[2] if len(profile_statistics) > 2 else 0
-            self._following = profile_statistics[3] if len(profile_statistics) > 3 else 0
-            self._followers = profile_statistics[4] if len(profile_statistics) > 4 else 0
-            self._pro = pro
-            self._bio = bio_text
-            self._four_faves = ffaves
-            
+            if self._profile_html is None:
+                log.debug("Fetching profile information for %s", self.username)
+                with metrics.stage("profile"):
+                    self._profile_html = (await self._amake_request(self.profile_url)).text
+            self._read_profile(groups)
         except Exception as e:
-            print(f"Error fetching profile info: {e}")
-            # Set defaults
-            self._profile_name = self.username
-            self._total_films = 0
-            self._total_films_this_year = 0
-            self._lists = 0
-            self._following = 0
-            self._followers = 0
-            self._pro = False
-            self._bio = ""
-            self._four_faves = []
-
-    def diary(self, page=1) -> list[DiaryEntry] | None:
-        if str(page) in self._diary:
-            return self._diary[str(page)]
+            self._profile_failed(groups, e)
+
+    def get_profile_info(self):
+        """Load every profile field"""
+        self.load_profile()
 
+    @property
+    def film_filter(self):
+        """Value of Letterboxd's filmFilter cookie for the diary filters"""
         film_filter = ""
         for k, v in self.diary_filters.items():
             if k == "only-films" and v:
@@ -188,99 +204,155 @@ class LetterboxdUser:
                 break
             if v:
                 film_filter += f"{k}%20"
+        return film_filter.strip("%20")
 
-        print(f"Fetching diary entries on page {page}")
-        print(f"Filters: {self.diary_filters}")
-        
-        diary_entries = []
-        cookies = {"filmFilter": film_filter.strip("%20")} if film_filter else None
-        
+    def diary(self, page=1, year=None, month=None) -> list[DiaryEntry] | None:
+        """Entries on one diary page, newest first, None past the last page.
+
+        Passing year and month reads the month-scoped diary
+        (/films/diary/for/YYYY/MM/) instead of the full one. Failed fetches
+        raise rather than look like an empty page, so a Letterboxd outage
+        is never stored as an empty month.
+        """
+        cache_key = (year, month, page)
+        if cache_key in self._diary:
+            return self._diary[cache_key]
+
+        diary_url, cookies = self._diary_request(year, month)
+        log.debug("Fetching diary entries on page %d of %s (filters: %s)", page, diary_url, self.diary_filters)
         try:
-            res = self._make_request(
-                self.profile_url + f"/films/diary/page/{page}",
-                cookies=cookies
-            )
-            soup = BeautifulSoup(res.text, "html.parser")
-            rows = soup.find_all("tr", class_="diary-entry-row")
-
-            if not rows:
-                print(f"Diary page {page} does not exist or is empty")
-                return None
-
-            current_year = ""
-            current_month = ""
-            
-            # Get initial year and month from first row
-            first_row = rows[0]
-            first_calendar = first_row.find("td", class_="td-calendar")
-            if first_calendar:
-                year_elem = first_calendar.find("small")
-                month_elem = first_calendar.find("strong")
-                if year_elem:
-                    current_year = year_elem.text.strip()
-                if month_elem:
-                    current_month = month_elem.text.strip()
-
-            for tr in rows:
-                try:
-                    tr_calendar = tr.find("td", class_="td-calendar")
-                    if tr_calendar and tr_calendar.text.strip():
-                        year_elem = tr_calendar.find("small")
-                        month_elem = tr_calendar.find("strong")
-                        if year_elem:
-                            current_year = year_elem.text.strip()
-                        if month_elem:
-                            current_month = month_elem.text.strip()
-                    
-                    day_elem = tr.find("td", class_="td-day")
-                    day = day_elem.text.strip() if day_elem else "1"
-                    
-                    film_details = tr.find("td", class_="td-film-details")
-                    if not film_details:
-                        continue
-                        
-                    film_title = film_details.text.strip()
-                    film_slug = film_details.div.get("data-film-slug") if film_details.div else None
-                    
-                    if not film_slug:
-                        continue
-                    
-                    released_elem = tr.find("td", class_="td-released")
-                    film_year = released_elem.text.strip() if released_elem else None
-                    film_year = int(film_year) if film_year and film_year.isdigit() else None
-                    
-                    rating_elem = tr.find("td", class_="td-rating")
-                    rating = rating_elem.text.replace("×", " ").strip() if rating_elem else ""
-                    
-                    like_elem = tr.find("td", class_="td-like")
-                    like = bool(like_elem and like_elem.find("span", class_="icon-liked"))
-                    
-                    rewatch_elem = tr.find("td", class_="td-rewatch")
-                    rewatch = not bool(rewatch_elem and "icon-status-off" in rewatch_elem.get("class", []))
-                    
-                    diary_entries.append(
-                        DiaryEntry(
-                            f"{current_year}-{current_month}-{day}",
-                            film_title,
-                            film_year,
-                            rating,
-                            like,
-                            rewatch,
-                            film_slug
-                        )
-                    )
-                except Exception as e:
-                    print(f"Error parsing diary entry: {e}")
-                    continue
-
-            self._diary[str(page)] = diary_entries
-            time.sleep(0.5)  # Be nice to the server
-            return diary_entries
-            
+            with metrics.stage("diary_fetch"):
+                res = self._make_request(diary_url + f"page/{page}/", cookies=cookies)
+            return self._read_diary_page(cache_key, res)
+        except UserNotFoundError:
+            raise
+        except Exception as e:
+            log.warning("Error fetching diary page %d of %s: %s", page, diary_url, e)
+            raise
+
+    async def adiary(self, page=1, year=None, month=None) -> list[DiaryEntry] | None:
+        """Async version of diary, sharing its per-page cache"""
+        cache_key = (year, month, page)
+        if cache_key in self._diary:
+            return self._diary[cache_key]
+
+        diary_url, cookies = self._diary_request(year, month)
+        log.debug("Fetching diary entries on page %d of %s (filters: %s)", page, diary_url, self.diary_filters)
+        try:
+            with metrics.stage("diary_fetch"):
+                res = await self._amake_request(diary_url + f"page/{page}/", cookies=cookies)
+            return self._read_diary_page(cache_key, res)
+        except UserNotFoundError:
+            raise
         except Exception as e:
-            print(f"Error fetching diary page {page}: {e}")
+            log.warning("Error fetching diary page %d of %s: %s", page, diary_url, e)
+            raise
+
+    def _diary_request(self, year, month):
+        """Diary URL (without the page) and filter cookies for a scope"""
+        diary_url = self.profile_url + "/films/diary/"
+        if year and month:
+            diary_url += f"for/{year}/{month:02d}/"
+        elif year:
+            diary_url += f"for/{year}/"
+
+        film_filter = self.film_filter
+        return diary_url, {"filmFilter": film_filter} if film_filter else None
+
+    def _read_diary_page(self, cache_key, res):
+        metrics.inc(metrics.DIARY_PAGES)
+        with metrics.stage("diary_parse"):
+            diary_entries, page_count = parse_diary_listing(res.text)
+        if page_count is not None:
+            self._page_counts[cache_key[:2]] = page_count
+
+        if not diary_entries:
+            log.debug("Diary page %d does not exist or is empty", cache_key[2])
             return None
 
+        self._diary[cache_key] = diary_entries
+        return diary_entries
+
+    def _diary_pages(self, year=None, month=None, max_pages=DIARY_MAX_PAGES, prefetch=DIARY_PREFETCH_PAGES):
+        """Yield the non-empty pages of a diary in page order, fetching ahead.
+
+        Page 1 comes first and its pagination links give the page count;
+        up to `prefetch` of the following pages are then in flight at once.
+        A diary without pagination has one page, unless page 1 is full (the
+        links couldn't be read), in which case pages are fetched until an
+        empty one. Once the caller stops, pages whose request hasn't been
+        sent yet are skipped; the (at most `prefetch`) requests already in
+        flight still complete and are discarded.
+        """
+        first = self.diary(page=1, year=year, month=month)
+        if not first:
+            return
+        yield first
+
+        last = self._page_counts.get((year, month))
+        if last is None and len(first) >= DIARY_PAGE_SIZE:
+            last = max_pages
+        last = min(last or 1, max_pages)
+        if last < 2:
+            return
+
+        stopped = threading.Event()
+
+        def fetch(page):
+            if stopped.is_set():
+                return []
+            return self.diary(page=page, year=year, month=month)
+
+        # Workers report their stage timings to the caller's request
+        fetch = metrics.bind(fetch)
+        pool = ThreadPoolExecutor(max_workers=max(1, prefetch), thread_name_prefix="diary")
+        pending = deque()
+        next_page = 2
+        try:
+            while True:
+                while next_page <= last and len(pending) < max(1, prefetch):
+                    pending.append(pool.submit(fetch, next_page))
+                    next_page += 1
+                if not pending:
+                    return
+                page_entries = pending.popleft().result()
+                if not page_entries:
+                    return
+                yield page_entries
+        finally:
+            stopped.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def diary_range(self, start, end, max_pages=DIARY_MAX_PAGES) -> list[DiaryEntry]:
+        """All diary entries watched between start and end (inclusive dates).
+
+        Ranges inside one calendar month or year read the month- or
+        year-scoped diary. Pages are newest first, so entries newer than
+        `end` are skipped and paging stops at the first entry older than
+        `start`.
+        """
+        year = start.year if start.year == end.year else None
+        month = start.month if year and start.month == end.month else None
+
+        entries = []
+        with closing(self._diary_pages(year, month, max_pages)) as pages:
+            for page_entries in pages:
+                passed_start = False
+                for entry in page_entries:
+                    watched = entry.date
+                    if watched > end:
+                        continue
+                    if watched < start:
+                        passed_start = True
+                        break
+                    entries.append(entry)
+
+                # Prefetched pages not requested yet are skipped on the way out
+                if passed_start:
+                    break
+
+        return entries
+
     def print_info(self):
         print(f"Username: {self.username}")
         print(f"Profile URL: {self.profile_url}")
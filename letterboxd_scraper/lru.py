@@ -0,0 +1,108 @@
+import logging
+import threading
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+def image_nbytes(image):
+    """Decoded size of a PIL image"""
+    return image.width * image.height * len(image.getbands())
+
+class ByteLRU:
+    """Thread-safe LRU bounded by the total size of its values.
+
+    `sizeof(value)` is each value's size in bytes; a value larger than the
+    whole budget is not kept.
+    """
+
+    def __init__(self, max_bytes, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._items = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The value for key (now most recently used), or None"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+
+    def pop(self, key):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+                return old[0]
+            return None
+
+    def __len__(self):
+        return len(self._items)
+
+class DiskBudget:
+    """Keeps the files matching `pattern` in a directory under max_bytes, oldest first out.
+
+    The directory is rescanned only after about a tenth of the budget has
+    been written since the last scan, so recording writes stays cheap.
+    """
+
+    def __init__(self, directory, max_bytes, pattern="*"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.pattern = pattern
+        self._written = None  # bytes written since the last scan, None before the first
+        self._lock = threading.Lock()
+
+    def added(self, nbytes):
+        """Record a write of nbytes, pruning the directory when it is due"""
+        with self._lock:
+            if self._written is not None and self._written + nbytes < self.max_bytes // 10:
+                self._written += nbytes
+                return
+            self._written = 0
+        self.prune()
+
+    def prune(self) -> int:
+        """Remove the oldest files until the directory fits the budget; returns how many"""
+        files = []
+        for path in self.directory.glob(self.pattern):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning("Error removing %s: %s", path.name, e)
+                continue
+            total -= size
+        if removed:
+            log.debug("Pruned %d files from %s", removed, self.directory)
+        return removed
@@ -0,0 +1,231 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Histogram buckets (seconds), from a warm tile up to a cold multi-page scrape
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labels, key)} {value}"
+
+class Histogram:
+    """Cumulative-bucket histogram in Prometheus' layout"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self):
+        with self._lock:
+            values = sorted((key, list(series)) for key, series in self._values.items())
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, [('le', bound)])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {series[-1]:.6f}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "letterboxd_stage_seconds", "Time spent in each scrape/render stage", ("stage",)
+)
+DIARY_PAGES = REGISTRY.counter(
+    "letterboxd_diary_pages_total", "Diary pages fetched from Letterboxd"
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "letterboxd_cache_lookups_total", "Cache lookups by cache and result", ("cache", "result")
+)
+DOWNLOADED_BYTES = REGISTRY.counter(
+    "letterboxd_downloaded_bytes_total", "Response body bytes downloaded", ("host",)
+)
+COALESCED_CALLS = REGISTRY.counter(
+    "letterboxd_coalesced_calls_total", "Calls served by an identical call already in flight", ("group",)
+)
+
+class RequestMetrics:
+    """Stage timings and counters collected for one request or job.
+
+    Stages may be recorded from several threads (poster workers) at once.
+    """
+
+    def __init__(self):
+        self.samples = []   # (stage, seconds) in the order they finished
+        self.counts = {}    # (metric name, label values) -> amount
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage, seconds):
+        with self._lock:
+            self.samples.append((stage, seconds))
+
+    def add(self, metric, labels, amount):
+        key = (metric, labels)
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + amount
+
+    def stages(self):
+        """stage -> (count, total milliseconds), in first-seen order"""
+        totals = {}
+        with self._lock:
+            for stage, seconds in self.samples:
+                count, ms = totals.get(stage, (0, 0.0))
+                totals[stage] = (count + 1, ms + seconds * 1000)
+        return totals
+
+    def export(self):
+        """Picklable snapshot, merged back with `merge` (e.g. from a render worker)"""
+        with self._lock:
+            return list(self.samples), dict(self.counts)
+
+    def server_timing(self) -> str:
+        """Value for a Server-Timing response header"""
+        return ", ".join(f"{stage};dur={ms:.1f}" for stage, (_, ms) in self.stages().items())
+
+    def as_dict(self):
+        counters = {}
+        with self._lock:
+            for (metric, labels), amount in self.counts.items():
+                name = metric.removeprefix("letterboxd_").removesuffix("_total")
+                counters[".".join((name, *labels))] = amount
+        return {
+            "stages_ms": {stage: round(ms, 1) for stage, (_, ms) in self.stages().items()},
+            "counters": counters,
+        }
+
+_current = contextvars.ContextVar("letterboxd_request_metrics", default=None)
+
+def start_request():
+    """Collect metrics for the current context; returns (RequestMetrics, reset token)"""
+    collected = RequestMetrics()
+    return collected, _current.set(collected)
+
+def end_request(token):
+    _current.reset(token)
+
+def current() -> RequestMetrics | None:
+    return _current.get()
+
+def bind(fn):
+    """Run fn in a copy of the caller's context, so pool threads report to the same request"""
+    context = contextvars.copy_context()
+
+    @wraps(fn)
+    def bound(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return bound
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    collected = _current.get()
+    if collected is not None:
+        collected.add_stage(stage, seconds)
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as one observation of a stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+def timed(name):
+    """Decorator form of `stage`"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def inc(counter, amount=1, **labels):
+    counter.inc(amount, **labels)
+    collected = _current.get()
+    if collected is not None:
+        collected.add(counter.name, tuple(str(labels[name]) for name in counter.labels), amount)
+
+def cache_lookup(cache, hit):
+    inc(CACHE_LOOKUPS, cache=cache, result="hit" if hit else "miss")
+
+def merge(snapshot):
+    """Fold an exported RequestMetrics snapshot into this process and request"""
+    samples, counts = snapshot
+    for name, seconds in samples:
+        observe_stage(name, seconds)
+    for (metric, labels), amount in counts.items():
+        counter = REGISTRY.get(metric)
+        inc(counter, amount, **dict(zip(counter.labels, labels)))
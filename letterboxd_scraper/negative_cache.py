@@ -0,0 +1,65 @@
+import logging
+import sqlite3
+import time
+
+from .config import NEGATIVE_CACHE_DB
+from .shared import process_wide
+from .sqlite import thread_connections
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+class NegativeCache:
+    """Short-lived record of lookups that failed or found nothing.
+
+    Keyed by (kind, key), e.g. ("poster", slug) or ("user", username).
+    Each entry carries its own expiry, so a definite miss (a 404) can be
+    remembered for longer than a timeout. Stored in SQLite next to the
+    other caches so every gunicorn worker sees the same misses.
+    """
+
+    def __init__(self, path=NEGATIVE_CACHE_DB):
+        self.path = path
+        self._connect = thread_connections(path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS misses ("
+                " kind TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " reason TEXT NOT NULL,"
+                " expires REAL NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+
+    def get(self, kind, key) -> str | None:
+        """Return the recorded reason while the miss is fresh, else None"""
+        try:
+            row = self._connect().execute(
+                "SELECT reason, expires FROM misses WHERE kind = ? AND key = ?",
+                (kind, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.warning("Error reading negative cache for %s %s: %s", kind, key, e)
+            return None
+
+        reason = row[0] if row and row[1] > time.time() else None
+        metrics.cache_lookup(f"negative_{kind}", reason is not None)
+        return reason
+
+    def put(self, kind, key, reason, ttl):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO misses (kind, key, reason, expires) VALUES (?, ?, ?, ?)",
+                    (kind, key, reason, now + ttl)
+                )
+                # Expired rows are only dead weight, drop them while we're writing anyway
+                conn.execute("DELETE FROM misses WHERE expires < ?", (now,))
+        except sqlite3.Error as e:
+            log.warning("Error writing negative cache for %s %s: %s", kind, key, e)
+
+@process_wide
+def get_negative_cache() -> NegativeCache:
+    """Return the shared process-wide negative cache"""
+    return NegativeCache()
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, features
+
+from .config import JPEG_QUALITY, WEBP_QUALITY, AVIF_QUALITY, PREVIEW_WIDTH, PREVIEW_QUALITY
+from . import metrics
+
+@dataclass(frozen=True)
+class OutputFormat:
+    name: str
+    mimetype: str
+    extension: str
+    pil_format: str
+    quality: int
+    options: tuple = ()   # extra keyword arguments for Image.save
+
+def _has_codec(module):
+    # Unknown modules (e.g. avif before Pillow 11.2) count as unsupported
+    return module in features.modules and features.check_module(module)
+
+FORMATS = {
+    "jpeg": OutputFormat(
+        "jpeg", "image/jpeg", "jpg", "JPEG", JPEG_QUALITY,
+        (("progressive", True), ("optimize", True))
+    ),
+}
+if _has_codec("webp"):
+    FORMATS["webp"] = OutputFormat("webp", "image/webp", "webp", "WEBP", WEBP_QUALITY, (("method", 4),))
+if _has_codec("avif"):
+    FORMATS["avif"] = OutputFormat("avif", "image/avif", "avif", "AVIF", AVIF_QUALITY)
+
+DEFAULT_FORMAT = "jpeg"
+
+# Smallest files first; only formats a client names explicitly are used
+PREFERENCE = ("avif", "webp", "jpeg")
+
+def negotiate_format(accept_header) -> str:
+    """Pick the smallest supported format the Accept header explicitly lists.
+
+    Wildcards don't count: a client sending only */* gets JPEG.
+    """
+    accepted = set()
+    for part in (accept_header or "").split(","):
+        mimetype, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(mimetype.strip().lower())
+
+    for name in PREFERENCE:
+        if name in FORMATS and FORMATS[name].mimetype in accepted:
+            return name
+    return DEFAULT_FORMAT
+
+def variant_name(fmt, preview=False):
+    """Cache-key suffix identifying one encoding of a wrapped image"""
+    return f"{fmt}{'-preview' if preview else ''}"
+
+def encode(image, fmt=DEFAULT_FORMAT, preview=False, quality=None) -> bytes:
+    """Encode a composed wrapped image, optionally as a low-resolution preview"""
+    output = FORMATS[fmt]
+    if preview:
+        with metrics.stage("preview_resize"):
+            height = round(image.height * PREVIEW_WIDTH / image.width)
+            image = image.resize((PREVIEW_WIDTH, height), Image.Resampling.LANCZOS)
+        quality = quality or PREVIEW_QUALITY
+
+    buf = BytesIO()
+    with metrics.stage(f"encode_{fmt}"):
+        image.save(buf, format=output.pil_format, quality=quality or output.quality, **dict(output.options))
+    return buf.getvalue()
@@ -0,0 +1,270 @@
+"""HTML parsing for profile and diary pages.
+
+The lxml backend walks each diary row's cells once; the BeautifulSoup
+backend is the original implementation, kept as a fallback for hosts
+without lxml and as the baseline in benchmarks/bench_parse.py.
+
+parse_diary_listing also returns the diary's page count from its
+pagination links (None when there are none, i.e. a single page). The
+profile parsers only read the PROFILE_GROUPS they are asked for.
+"""
+import logging
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    lxml = None
+
+from .config import HTML_PARSER
+from .film import Film, DiaryEntry, parse_diary_date, parse_rating
+
+log = logging.getLogger(__name__)
+
+# Parts of the profile page that can be parsed independently
+PROFILE_GROUPS = ("header", "stats", "bio", "favourites")
+
+def _classes(el):
+    return (el.get("class") or "").split()
+
+def _has_class(cls):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {cls} ")'
+
+def _text(el):
+    return el.text_content() if el is not None else ""
+
+if lxml is not None:
+    # Compiled once, evaluated per page / per row
+    _DIARY_ROWS = etree.XPath(f"//tr[{_has_class('diary-entry-row')}]")
+    _LIKED_ICON = etree.XPath(f".//span[{_has_class('icon-liked')}]")
+    _PAGE_LINKS = etree.XPath(f"//div[{_has_class('paginate-pages')}]//li")
+
+def _diary_entry(current_year, current_month, day, film_title, film_year, rating, like, rewatch, film_slug):
+    watched = parse_diary_date(current_year, current_month, day)
+    if watched is None:
+        raise ValueError(f"unreadable date '{current_year}-{current_month}-{day}'")
+    return DiaryEntry(
+        watched,
+        film_title,
+        film_year,
+        parse_rating(rating),
+        like,
+        rewatch,
+        film_slug
+    )
+
+def _diary_entries_lxml(doc):
+    rows = _DIARY_ROWS(doc)
+
+    diary_entries = []
+    current_year = ""
+    current_month = ""
+
+    for tr in rows:
+        try:
+            day = "1"
+            film_details = None
+            film_year = None
+            rating = ""
+            like = False
+            rewatch = True
+
+            # One pass over the row's cells instead of a find() per field
+            for td in tr.iterchildren("td"):
+                classes = _classes(td)
+                if "td-calendar" in classes:
+                    if _text(td).strip():
+                        year_elem = td.find(".//small")
+                        month_elem = td.find(".//strong")
+                        if year_elem is not None:
+                            current_year = _text(year_elem).strip()
+                        if month_elem is not None:
+                            current_month = _text(month_elem).strip()
+                elif "td-day" in classes:
+                    day = _text(td).strip()
+                elif "td-film-details" in classes:
+                    film_details = td
+                elif "td-released" in classes:
+                    released = _text(td).strip()
+                    film_year = int(released) if released.isdigit() else None
+                elif "td-rating" in classes:
+                    rating = _text(td).replace("×", " ").strip()
+                elif "td-like" in classes:
+                    like = bool(_LIKED_ICON(td))
+                elif "td-rewatch" in classes:
+                    rewatch = "icon-status-off" not in classes
+
+            if film_details is None:
+                continue
+
+            film_title = _text(film_details).strip()
+            film_div = film_details.find(".//div")
+            film_slug = film_div.get("data-film-slug") if film_div is not None else None
+            if not film_slug:
+                continue
+
+            diary_entries.append(
+                _diary_entry(current_year, current_month, day, film_title, film_year, rating, like, rewatch, film_slug)
+            )
+        except Exception as e:
+            log.warning("Error parsing diary entry: %s", e)
+            continue
+
+    return diary_entries
+
+def _page_count(labels):
+    """Highest page number among the pagination labels, None without pagination"""
+    numbers = [int(label) for label in map(str.strip, labels) if label.isdigit()]
+    return max(numbers) if numbers else None
+
+def parse_diary_page_lxml(html) -> list[DiaryEntry]:
+    return _diary_entries_lxml(lxml.html.fromstring(html))
+
+def parse_diary_listing_lxml(html) -> tuple[list[DiaryEntry], int | None]:
+    doc = lxml.html.fromstring(html)
+    return _diary_entries_lxml(doc), _page_count(_text(li) for li in _PAGE_LINKS(doc))
+
+def _diary_entries_bs4(soup):
+    rows = soup.find_all("tr", class_="diary-entry-row")
+
+    diary_entries = []
+    current_year = ""
+    current_month = ""
+
+    for tr in rows:
+        try:
+            tr_calendar = tr.find("td", class_="td-calendar")
+            if tr_calendar and tr_calendar.text.strip():
+                year_elem = tr_calendar.find("small")
+                month_elem = tr_calendar.find("strong")
+                if year_elem:
+                    current_year = year_elem.text.strip()
+                if month_elem:
+                    current_month = month_elem.text.strip()
+
+            day_elem = tr.find("td", class_="td-day")
+            day = day_elem.text.strip() if day_elem else "1"
+
+            film_details = tr.find("td", class_="td-film-details")
+            if not film_details:
+                continue
+
+            film_title = film_details.text.strip()
+            film_slug = film_details.div.get("data-film-slug") if film_details.div else None
+
+            if not film_slug:
+                continue
+
+            released_elem = tr.find("td", class_="td-released")
+            film_year = released_elem.text.strip() if released_elem else None
+            film_year = int(film_year) if film_year and film_year.isdigit() else None
+
+            rating_elem = tr.find("td", class_="td-rating")
+            rating = rating_elem.text.replace("×", " ").strip() if rating_elem else ""
+
+            like_elem = tr.find("td", class_="td-like")
+            like = bool(like_elem and like_elem.find("span", class_="icon-liked"))
+
+            rewatch_elem = tr.find("td", class_="td-rewatch")
+            rewatch = not bool(rewatch_elem and "icon-status-off" in rewatch_elem.get("class", []))
+
+            diary_entries.append(
+                _diary_entry(current_year, current_month, day, film_title, film_year, rating, like, rewatch, film_slug)
+            )
+        except Exception as e:
+            log.warning("Error parsing diary entry: %s", e)
+            continue
+
+    return diary_entries
+
+def parse_diary_page_bs4(html) -> list[DiaryEntry]:
+    return _diary_entries_bs4(BeautifulSoup(html, "html.parser"))
+
+def parse_diary_listing_bs4(html) -> tuple[list[DiaryEntry], int | None]:
+    soup = BeautifulSoup(html, "html.parser")
+    return _diary_entries_bs4(soup), _page_count(li.get_text() for li in soup.select("div.paginate-pages li"))
+
+def parse_profile_page_lxml(html, username, groups=PROFILE_GROUPS) -> dict:
+    doc = lxml.html.fromstring(html)
+    profile = {}
+
+    if "header" in groups:
+        name_elem = doc.xpath(f"//div[{_has_class('profile-name-wrap')}]//h1")
+        profile["profile_name"] = _text(name_elem[0]).strip() if name_elem else username
+        profile["pro"] = bool(doc.xpath(f"//span[{_has_class('badge')}]"))
+
+    if "stats" in groups:
+        profile_statistics = []
+        for stat in doc.xpath(f"//h4[{_has_class('profile-statistic')}]"):
+            digits = "".join([c for c in _text(stat) if c.isdigit()])
+            profile_statistics.append(int(digits) if digits else 0)
+        profile["statistics"] = profile_statistics
+
+    if "bio" in groups:
+        bio_text = ""
+        bio_elem = doc.xpath('//section[@id="person-bio"]') or doc.xpath(f"//div[{_has_class('bio')}]")
+        if bio_elem:
+            bio_div = bio_elem[0].find(".//div")
+            if bio_div is not None:
+                bio_text = "\n".join(t.strip() for t in bio_div.itertext() if t.strip())
+        profile["bio"] = bio_text
+
+    if "favourites" in groups:
+        ffaves = []
+        for f in doc.xpath(f"//li[{_has_class('favourite-film-poster-container')}]"):
+            fave_div = f.find(".//div")
+            if fave_div is not None and fave_div.get("data-film-slug"):
+                img_elem = fave_div.find(".//img")
+                film_title = img_elem.get("alt", "Unknown") if img_elem is not None else "Unknown"
+                ffaves.append(Film(film_title=film_title, film_year=None, film_slug=fave_div.get("data-film-slug")))
+        profile["four_faves"] = ffaves
+
+    return profile
+
+def parse_profile_page_bs4(html, username, groups=PROFILE_GROUPS) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+    profile = {}
+
+    if "header" in groups:
+        profile_name_elem = soup.find("div", class_="profile-name-wrap")
+        if profile_name_elem and profile_name_elem.h1:
+            profile["profile_name"] = profile_name_elem.h1.text.strip()
+        else:
+            profile["profile_name"] = username
+        profile["pro"] = soup.find("span", class_="badge") is not None
+
+    if "stats" in groups:
+        profile_statistics = []
+        for stat in soup.find_all("h4", "profile-statistic"):
+            digits = "".join([c for c in stat.text if c.isdigit()])
+            profile_statistics.append(int(digits) if digits else 0)
+        profile["statistics"] = profile_statistics
+
+    if "bio" in groups:
+        bio_elem = soup.find("section", id="person-bio") or soup.find("div", class_="bio")
+        bio_text = ""
+        if bio_elem and bio_elem.div:
+            bio_text = bio_elem.div.get_text("\n", strip=True)
+        profile["bio"] = bio_text
+
+    if "favourites" in groups:
+        ffaves = []
+        for f in soup.find_all("li", class_="favourite-film-poster-container"):
+            if f.div and f.div.get("data-film-slug"):
+                img_elem = f.div.find("img")
+                film_title = img_elem.get("alt", "Unknown") if img_elem else "Unknown"
+                ffaves.append(Film(film_title=film_title, film_year=None, film_slug=f.div["data-film-slug"]))
+        profile["four_faves"] = ffaves
+
+    return profile
+
+if HTML_PARSER == "lxml" and lxml is not None:
+    parse_diary_page = parse_diary_page_lxml
+    parse_diary_listing = parse_diary_listing_lxml
+    parse_profile_page = parse_profile_page_lxml
+else:
+    parse_diary_page = parse_diary_page_bs4
+    parse_diary_listing = parse_diary_listing_bs4
+    parse_profile_page = parse_profile_page_bs4
@@ -0,0 +1,66 @@
+import logging
+import sqlite3
+import time
+
+from .config import POSTER_DIR, POSTER_INDEX_TTL
+from .shared import process_wide
+from .sqlite import thread_connections
+
+log = logging.getLogger(__name__)
+
+class PosterIndex:
+    """Persistent slug -> poster URL -> local file index.
+
+    Backed by SQLite in WAL mode so several gunicorn workers can read and
+    write it at once. Entries older than `ttl` seconds are treated as
+    missing, which makes the next lookup go back to Letterboxd.
+    """
+
+    def __init__(self, path=POSTER_DIR / "index.sqlite3", ttl=POSTER_INDEX_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._connect = thread_connections(path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS posters ("
+                " slug TEXT PRIMARY KEY,"
+                " poster_url TEXT NOT NULL,"
+                " filename TEXT,"
+                " updated REAL NOT NULL)"
+            )
+
+    def get(self, slug):
+        """Return (poster_url, filename) for a fresh entry, else None"""
+        try:
+            row = self._connect().execute(
+                "SELECT poster_url, filename, updated FROM posters WHERE slug = ?",
+                (slug,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.warning("Error reading poster index for %s: %s", slug, e)
+            return None
+
+        if row is None or time.time() - row[2] > self.ttl:
+            return None
+        return row[0], row[1]
+
+    def put(self, slug, poster_url, filename=None):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO posters (slug, poster_url, filename, updated) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(slug) DO UPDATE SET"
+                    " poster_url = excluded.poster_url,"
+                    " filename = CASE WHEN excluded.poster_url = posters.poster_url"
+                    "  THEN COALESCE(excluded.filename, posters.filename)"
+                    "  ELSE excluded.filename END,"
+                    " updated = excluded.updated",
+                    (slug, poster_url, filename, time.time())
+                )
+        except sqlite3.Error as e:
+            log.warning("Error writing poster index for %s: %s", slug, e)
+
+@process_wide
+def get_poster_index() -> PosterIndex:
+    """Return the shared process-wide poster index"""
+    return PosterIndex()
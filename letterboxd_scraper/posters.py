@@ -0,0 +1,70 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .lru import ByteLRU, image_nbytes
+from .shared import process_wide
+from .config import IMG_DIM, POSTER_CACHE_MAX_BYTES, POSTER_WORKERS, REQUEST_TIMEOUT
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+class PosterCache:
+    """Decoded posters shared by the whole process, in an LRU bounded by decoded size.
+
+    Films only keep the path of their poster file; `Film.get_poster_image`
+    decodes through here, so repeated use is cheap but memory stays capped.
+    """
+
+    def __init__(self, max_bytes=POSTER_CACHE_MAX_BYTES):
+        self._images = ByteLRU(max_bytes, sizeof=image_nbytes)
+
+    def get_or_create(self, key, render):
+        """Return the cached image, building it with render() on a miss"""
+        image = self._images.get(key)
+        metrics.cache_lookup("poster_memory", image is not None)
+        if image is None:
+            image = render()
+            self._images.put(key, image)
+        return image
+
+    def load(self, path):
+        """Decoded RGB poster file, JPEGs scaled down while decoding when larger than a poster"""
+        def decode():
+            with Image.open(path) as f:
+                f.draft("RGB", (IMG_DIM.width, IMG_DIM.height))
+                return f.convert("RGB")
+        return self.get_or_create(str(path), decode)
+
+@process_wide
+def get_poster_cache() -> PosterCache:
+    """Return the shared process-wide poster cache"""
+    return PosterCache()
+
+def _fetch_one(film, timeout):
+    try:
+        film.fetch_poster(timeout=timeout)
+        return True
+    except Exception as e:
+        log.warning("Error fetching poster for %s: %s", film.film_title, e)
+        return False
+
+def resolve_posters(films, max_workers=POSTER_WORKERS, timeout=REQUEST_TIMEOUT):
+    """Fetch posters for many films concurrently, without decoding them.
+
+    Each worker resolves the poster URL and downloads the image for one film,
+    so a month costs roughly the slowest few fetches instead of their sum.
+    Afterwards each film has a `poster_path` or is marked as a placeholder.
+    Results are returned in the same order as `films`: True when the film is
+    ready to draw, False when its poster could not be produced at all.
+    """
+    films = list(films)
+    if not films:
+        return []
+
+    workers = max(1, min(max_workers, len(films)))
+    # Workers report their stage timings to the caller's request
+    fetch = metrics.bind(lambda film: _fetch_one(film, timeout))
+    with metrics.stage("posters"), ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poster") as pool:
+        return list(pool.map(fetch, films))
@@ -0,0 +1,72 @@
+import hashlib
+import logging
+import os
+import time
+
+from .atomic import write_atomic
+from .lru import ByteLRU, DiskBudget
+from .config import RENDER_DIR, RENDER_CACHE_MAX_BYTES, RENDER_DISK_MAX_BYTES
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+class RenderCache:
+    """Two-tier cache for finished wrapped images.
+
+    Entries live in an in-process LRU bounded by total byte size and are
+    mirrored to RENDER_DIR so they survive restarts and are shared between
+    workers. The directory is kept under `disk_max_bytes`, oldest entries
+    removed first.
+    """
+
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_BYTES, cache_dir=RENDER_DIR, disk_max_bytes=RENDER_DISK_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self._disk = DiskBudget(cache_dir, disk_max_bytes, "*.bin")
+        self._entries = ByteLRU(max_bytes, sizeof=lambda entry: len(entry[0]))  # key -> (data, last_modified)
+
+    @staticmethod
+    def make_key(username, month, year, fingerprint, variant=""):
+        """Build a stable cache key, also usable as an ETag"""
+        raw = f"{username.lower()}|{year}|{month}|{fingerprint}|{variant}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.bin"
+
+    def get(self, key):
+        """Return (data, last_modified) or None"""
+        hit = self._entries.get(key)
+        if hit is not None:
+            metrics.cache_lookup("render", True)
+            return hit
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            last_modified = os.path.getmtime(path)
+        except OSError:
+            metrics.cache_lookup("render", False)
+            return None
+
+        metrics.cache_lookup("render_disk", True)
+        self._entries.put(key, (data, last_modified))
+        return data, last_modified
+
+    def put(self, key, data):
+        """Store data under key and return its last-modified timestamp"""
+        last_modified = time.time()
+        try:
+            write_atomic(self._path(key), data)
+            self._disk.added(len(data))
+        except OSError as e:
+            log.warning("Error writing render cache entry %s: %s", key, e)
+
+        self._entries.put(key, (data, last_modified))
+        return last_modified
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"RenderCache(entries={len(self)}, bytes={self._entries.nbytes})"
@@ -0,0 +1,64 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import RENDER_PROCESSES, LOG_LEVEL
+from .output import DEFAULT_FORMAT
+from .wrapped import render_variants
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _init_worker(level):
+    logging.basicConfig(level=level, format="%(asctime)s %(levelname)s [render] %(name)s: %(message)s")
+
+def _render_measured(spec, variants):
+    """Worker entry point: render and hand the stage timings back to the caller"""
+    collected, token = metrics.start_request()
+    try:
+        return render_variants(spec, variants), collected.export()
+    finally:
+        metrics.end_request(token)
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool for the render stage"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the web process has threads and open sqlite handles
+                _pool = ProcessPoolExecutor(
+                    max_workers=RENDER_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(LOG_LEVEL,)
+                )
+    return _pool
+
+def render(spec, variants=((DEFAULT_FORMAT, False),)) -> list[bytes]:
+    """Compose a RenderSpec off the calling process's GIL and encode each variant.
+
+    Runs inline when RENDER_PROCESSES is 0, or if the pool has died.
+    """
+    global _pool
+    variants = list(variants)
+    with metrics.stage("render"):
+        if not RENDER_PROCESSES:
+            return render_variants(spec, variants)
+
+        try:
+            data, snapshot = get_render_pool().submit(_render_measured, spec, variants).result()
+        except BrokenProcessPool as e:
+            log.warning("Render pool broken, rendering inline: %s", e)
+            with _pool_lock:
+                _pool = None
+            return render_variants(spec, variants)
+
+    # Compose/encode stages ran in the worker process, count them here
+    metrics.merge(snapshot)
+    return data
@@ -0,0 +1,35 @@
+def _distinct(entries):
+    """First entry per film, so rewatches don't take a second tile"""
+    seen = set()
+    distinct = []
+    for entry in entries:
+        if entry.film_slug not in seen:
+            seen.add(entry.film_slug)
+            distinct.append(entry)
+    return distinct
+
+def _rank_key(entry):
+    # Rating first, then liked, then rewatched, then the most recent
+    return (entry.rating, entry.like, entry.rewatch, entry.date)
+
+def recent(entries, count):
+    """The most recently logged films, newest first"""
+    return _distinct(sorted(entries, key=lambda e: e.date, reverse=True))[:count]
+
+def top_rated(entries, count):
+    """The best-ranked films, drawn best first"""
+    return _distinct(sorted(entries, key=_rank_key, reverse=True))[:count]
+
+def highlights(entries, count):
+    """The best-ranked films, drawn newest first like the diary"""
+    return sorted(top_rated(entries, count), key=lambda e: e.date, reverse=True)
+
+# Selection policies: (entries, tile count) -> at most that many entries with
+# distinct films, in drawing order. Only the selected posters are fetched.
+SELECTIONS = {
+    "highlights": highlights,
+    "top_rated": top_rated,
+    "recent": recent,
+}
+
+DEFAULT_SELECTION = "highlights"
@@ -0,0 +1,18 @@
+import threading
+from functools import wraps
+
+def process_wide(factory):
+    """Decorator: the first call builds factory()'s result, every call returns that instance"""
+    instance = None
+    lock = threading.Lock()
+
+    @wraps(factory)
+    def get():
+        nonlocal instance
+        if instance is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+        return instance
+
+    return get
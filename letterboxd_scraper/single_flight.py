@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import Future
+
+from . import metrics
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and share its result or exception. Nothing is
+    kept once the call returns, so this de-duplicates work, it doesn't cache.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}  # key -> Future of the in-flight call
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            metrics.inc(metrics.COALESCED_CALLS, group=self.name)
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
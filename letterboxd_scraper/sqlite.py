@@ -0,0 +1,21 @@
+import sqlite3
+import threading
+
+def thread_connections(path, timeout=5):
+    """Return a connect() that gives each calling thread its own connection to path.
+
+    sqlite3 connections can't be shared between threads. WAL lets the other
+    threads and gunicorn workers keep reading while one of them writes.
+    """
+    local = threading.local()
+
+    def connect() -> sqlite3.Connection:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn = conn
+        return conn
+
+    return connect
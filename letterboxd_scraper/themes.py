@@ -0,0 +1,61 @@
+import threading
+from dataclasses import dataclass
+
+from PIL import Image
+
+@dataclass(frozen=True)
+class Theme:
+    name: str
+    gradient_top: tuple           # RGB at the top edge of the canvas
+    gradient_bottom: tuple        # RGB at the bottom edge
+    text_color: str = "#FFFFFF"
+    accent_color: str = "#FF8000"
+    green_color: str = "#00D15B"
+    blue_color: str = "#00A2F5"
+    secondary_text: str = "#B8C5D1"
+
+    @property
+    def bg_color(self):
+        return "#%02X%02X%02X" % self.gradient_top
+
+THEMES = {
+    # Letterboxd's dark blue-gray, the original look
+    "letterboxd": Theme("letterboxd", gradient_top=(20, 24, 28), gradient_bottom=(28, 32, 36)),
+    "midnight": Theme(
+        "midnight",
+        gradient_top=(10, 12, 28),
+        gradient_bottom=(34, 20, 52),
+        accent_color="#40BCF4",
+        secondary_text="#A9B4E0"
+    ),
+}
+
+DEFAULT_THEME = "letterboxd"
+
+_canvases = {}
+_canvases_lock = threading.Lock()
+
+def _build_canvas(theme, width, height):
+    # Compute one column of the vertical gradient, then stretch it sideways
+    # in a single resize instead of drawing a line per row
+    top, bottom = theme.gradient_top, theme.gradient_bottom
+    column = Image.new("RGB", (1, height))
+    column.putdata([
+        tuple(int(t + (y / height) * (b - t)) for t, b in zip(top, bottom))
+        for y in range(height)
+    ])
+    return column.resize((width, height), Image.Resampling.NEAREST)
+
+def get_canvas(theme, width, height):
+    """Return a fresh copy of the background canvas for a theme and size.
+
+    The gradient is built once per (theme, size) and reused for every render.
+    """
+    key = (theme.name, width, height)
+    template = _canvases.get(key)
+    if template is None:
+        with _canvases_lock:
+            template = _canvases.get(key)
+            if template is None:
+                template = _canvases[key] = _build_canvas(theme, width, height)
+    return template.copy()
@@ -0,0 +1,73 @@
+import logging
+
+from PIL import Image
+
+from .atomic import write_atomic
+from .lru import ByteLRU, DiskBudget, image_nbytes
+from .shared import process_wide
+from .config import TILE_DIR, TILE_CACHE_MAX_BYTES, TILE_DISK_MAX_BYTES
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+class TileCache:
+    """Derived-asset cache for posters already resized and corner-masked.
+
+    Tiles are keyed by (name, width, height, radius), where name identifies
+    the source image: the poster file a tile was cut from, so a re-resolved
+    poster gets new tiles, or a key derived from title and year for
+    placeholders. They are kept as RGBA PNGs in TILE_DIR, at most
+    `disk_max_bytes` of them (oldest removed first), and served through an
+    in-memory LRU bounded by decoded size.
+    """
+
+    def __init__(self, tile_dir=TILE_DIR, max_bytes=TILE_CACHE_MAX_BYTES, disk_max_bytes=TILE_DISK_MAX_BYTES):
+        self.tile_dir = tile_dir
+        self._tiles = ByteLRU(max_bytes, sizeof=image_nbytes)
+        self._disk = DiskBudget(tile_dir, disk_max_bytes, "*.png")
+
+    def _path(self, name, width, height, radius):
+        return self.tile_dir / f"{name}_{width}x{height}_r{radius}.png"
+
+    def get(self, name, width, height, radius):
+        key = (name, width, height, radius)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            return tile
+
+        path = self._path(name, width, height, radius)
+        if not path.is_file():
+            return None
+        try:
+            with Image.open(path) as f:
+                tile = f.convert("RGBA")
+        except Exception as e:
+            log.warning("Error opening cached tile %s: %s", path.name, e)
+            return None
+
+        self._tiles.put(key, tile)
+        return tile
+
+    def put(self, name, width, height, radius, tile):
+        self._tiles.put((name, width, height, radius), tile)
+        path = self._path(name, width, height, radius)
+        try:
+            write_atomic(path, lambda f: tile.save(f, "PNG"))
+            self._disk.added(path.stat().st_size)
+        except OSError as e:
+            log.warning("Error writing tile for %s: %s", name, e)
+
+    def get_or_create(self, name, width, height, radius, render):
+        """Return the cached tile, building and storing it with render() on a miss"""
+        tile = self.get(name, width, height, radius)
+        metrics.cache_lookup("tile", tile is not None)
+        if tile is None:
+            with metrics.stage("tile_resize"):
+                tile = render()
+            self.put(name, width, height, radius, tile)
+        return tile
+
+@process_wide
+def get_tile_cache() -> TileCache:
+    """Return the shared process-wide tile cache"""
+    return TileCache()
@@ -1,133 +1,169 @@
 # letterboxd_scraper/wrapped.py - Enhanced with clean emoji stats like reference
 import random
 import math
-from datetime import datetime, timedelta
-from calendar import month_name
-import platform
-from pathlib import Path
+import logging
+import os
+from datetime import date, datetime, timedelta
+from calendar import month_name, monthrange
+import hashlib
 from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from io import BytesIO
 
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 import requests
 
-from .config import IMG_DIM
+from .config import IMG_DIM, POSTER_WORKERS
+from .diary_store import get_diary_store
+from .film import placeholder_image, placeholder_key
+from .posters import resolve_posters
+from .selection import SELECTIONS, DEFAULT_SELECTION
+from .tiles import get_tile_cache
+from .themes import THEMES, DEFAULT_THEME, get_canvas
+from .fonts import get_font
+from .output import encode
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+def _source_id(slug, path):
+    # What a tile is drawn from: the poster file, or a placeholder when path is None
+    return f"{slug}|{os.path.basename(path) if path else 'placeholder'}"
+
+def sources_digest(source_ids):
+    """Short hash identifying the posters a render is drawn from"""
+    return hashlib.sha1("\n".join(source_ids).encode("utf-8")).hexdigest()[:16]
+
+@dataclass
+class TileSpec:
+    """One poster on the grid; source is a file path or encoded image bytes"""
+    slug: str
+    x: int
+    y: int
+    width: int
+    height: int
+    source: str | bytes
+
+    def open(self):
+        """Open the source lazily; JPEGs are decoded at the smallest scale still covering the tile"""
+        image = Image.open(BytesIO(self.source) if isinstance(self.source, bytes) else self.source)
+        image.draft("RGB", (self.width, self.height))
+        return image
+
+    @property
+    def source_id(self):
+        return _source_id(self.slug, None if isinstance(self.source, bytes) else self.source)
+
+    @property
+    def tile_name(self):
+        """Tile cache name: the poster file the tile is cut from, or the placeholder key"""
+        return self.slug if isinstance(self.source, bytes) else os.path.splitext(os.path.basename(self.source))[0]
+
+@dataclass
+class RenderSpec:
+    """Everything the render stage needs, picklable for a process pool"""
+    username: str
+    month: int
+    year: int
+    theme: str
+    stats: dict
+    tiles: list = field(default_factory=list)
+    title: str = ""
+    subtitle: str = ""
+    profile: dict = field(default_factory=dict)
+
+    @property
+    def sources(self):
+        """Digest of the tiles' posters, part of the render cache key"""
+        return sources_digest(tile.source_id for tile in self.tiles)
+
+    @property
+    def has_placeholders(self):
+        return any(isinstance(tile.source, bytes) for tile in self.tiles)
+
+def _encode_png(image):
+    buf = BytesIO()
+    image.save(buf, "PNG")
+    return buf.getvalue()
+
+@lru_cache(maxsize=256)
+def _placeholder_png(title, year):
+    return _encode_png(placeholder_image(title, year))
+
+def render_variants(spec, variants):
+    """Compose a RenderSpec once and encode it as each (format, preview) variant.
+
+    Entry point for render worker processes; returns a list of bytes.
+    """
+    wrapped = LetterboxdWrapped(None, month=spec.month, year=spec.year, theme=spec.theme)
+    image = wrapped.compose(spec)
+    return [encode(image, fmt, preview=preview) for fmt, preview in variants]
 
 class LetterboxdWrapped:
-    def __init__(self, user, month=None, year=None):
+    # Profile fields compose() reads from spec.profile. The monthly image only
+    # shows the username, so its profile page is never fetched.
+    profile_fields = ()
+
+    # Posters drawn on the grid; only these are fetched and decoded
+    max_posters = 20
+
+    def __init__(self, user, month=None, year=None, poster_workers=POSTER_WORKERS, theme=DEFAULT_THEME,
+                 entries=None, selection=DEFAULT_SELECTION):
         self.user = user
+        self.poster_workers = poster_workers
+        # A name from SELECTIONS or any callable with the same signature
+        self.select = SELECTIONS[selection] if isinstance(selection, str) else selection
         self.month = month or datetime.now().month
         self.year = year or datetime.now().year
         self.month_name = month_name[self.month].lower()
+        # Entries already loaded elsewhere (e.g. a LetterboxdRecap) skip the diary store
+        self._monthly_entries = entries
+        self._shadows = {}
         
         # Instagram Story dimensions
         self.width = 1080
         self.height = 1920
+        self.header_height = 350
         
-        # Enhanced Letterboxd brand colors
-        self.bg_color = "#14181C"  # Letterboxd's dark blue-gray background
-        self.text_color = "#FFFFFF"  # White text
-        self.accent_color = "#FF8000"  # Letterboxd's signature orange
-        self.green_color = "#00D15B"   # Letterboxd green
-        self.blue_color = "#00A2F5"    # Letterboxd blue
-        self.secondary_text = "#B8C5D1"  # Light gray for secondary text
+        # Colour set (Letterboxd brand colours by default)
+        self.theme = THEMES[theme]
+        self.bg_color = self.theme.bg_color
+        self.text_color = self.theme.text_color
+        self.accent_color = self.theme.accent_color
+        self.green_color = self.theme.green_color
+        self.blue_color = self.theme.blue_color
+        self.secondary_text = self.theme.secondary_text
         
     def _get_font(self, size=40, bold=False):
-        """Get Helvetica font based on operating system"""
-        try:
-            system = platform.system()
-            if system == "Windows":
-                # Try Helvetica first, then Arial as fallback
-                font_paths = [
-                    "HelveticaNeue.ttf" if not bold else "HelveticaNeue-Bold.ttf",
-                    "helvetica.ttf" if not bold else "helveticab.ttf", 
-                    "arial.ttf" if not bold else "arialbd.ttf"
-                ]
-                for font_path in font_paths:
-                    try:
-                        return ImageFont.truetype(font_path, size=size)
-                    except:
-                        continue
-                        
-            elif system == "Darwin":  # macOS
-                font_paths = [
-                    "/System/Library/Fonts/Helvetica.ttc",
-                    "/System/Library/Fonts/HelveticaNeue.ttc",
-                    "/System/Library/Fonts/Arial.ttf"
-                ]
-                for font_path in font_paths:
-                    if Path(font_path).exists():
-                        return ImageFont.truetype(font_path, size=size)
-                        
-            else:  # Linux
-                font_paths = [
-                    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-                    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-                    "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/TTF/DejaVuSans.ttf"
-                ]
-                for font_path in font_paths:
-                    if Path(font_path).exists():
-                        return ImageFont.truetype(font_path, size=size)
-                        
-        except Exception as e:
-            print(f"Font loading error: {e}")
-        
-        return ImageFont.load_default()
+        """Get Helvetica (or the closest available) font from the shared registry"""
+        return get_font(size, bold=bold, family="helvetica")
 
     def _get_monthly_diary_entries(self):
         """Get diary entries for the specified month and year"""
-        all_entries = []
-        
-        # Get entries from multiple pages if needed
-        for page in range(1, 6):  # Check up to 5 pages
-            entries = self.user.diary(page=page)
-            if not entries:
-                break
-            all_entries.extend(entries)
-        
-        print(f"Found {len(all_entries)} total diary entries")
-        
-        # Filter by month and year
-        monthly_entries = []
-        target_month_name = month_name[self.month]
-        
-        # Month name mappings (both full and abbreviated)
-        month_mappings = {
-            'january': 1, 'jan': 1,
-            'february': 2, 'feb': 2,
-            'march': 3, 'mar': 3,
-            'april': 4, 'apr': 4,
-            'may': 5,
-            'june': 6, 'jun': 6,
-            'july': 7, 'jul': 7,
-            'august': 8, 'aug': 8,
-            'september': 9, 'sep': 9,
-            'october': 10, 'oct': 10,
-            'november': 11, 'nov': 11,
-            'december': 12, 'dec': 12
-        }
-        
-        for entry in all_entries:
-            try:
-                # Parse date (format: "YYYY-Month-DD")
-                date_parts = entry.date.split('-')
-                if len(date_parts) >= 3:
-                    entry_year = int(date_parts[0])
-                    entry_month_name = date_parts[1].lower()
-                    
-                    # Convert month name to number (handle both full and abbreviated)
-                    entry_month = month_mappings.get(entry_month_name)
-                    
-                    if entry_year == self.year and entry_month == self.month:
-                        monthly_entries.append(entry)
-            except (ValueError, IndexError) as e:
-                print(f"Error parsing date '{entry.date}': {e}")
-                continue
+        if self._monthly_entries is not None:
+            return self._monthly_entries
+
+        first_day = date(self.year, self.month, 1)
+        last_day = date(self.year, self.month, monthrange(self.year, self.month)[1])
+        with metrics.stage("diary"):
+            monthly_entries = get_diary_store().diary_range(self.user, first_day, last_day)
         
-        print(f"Found {len(monthly_entries)} entries for {target_month_name} {self.year}")
+        log.debug("Found %d entries for %s %d", len(monthly_entries), month_name[self.month], self.year)
+        self._monthly_entries = monthly_entries
         return monthly_entries
 
-    def _calculate_stats(self, entries):
-        """Calculate stats for the clean emoji layout"""
+    def fingerprint(self):
+        """Hash of the month's diary entries, changes whenever an entry is edited"""
+        digest = hashlib.sha1()
+        for entry in self._get_monthly_diary_entries():
+            digest.update(
+                f"{entry.date}|{entry.film_slug}|{entry.rating}|{entry.like}|{entry.rewatch}\n".encode("utf-8")
+            )
+        return digest.hexdigest()
+
+    def _calculate_stats(self, entries, months=None):
+        """Calculate stats for the clean emoji layout, plus per-month stats given the entries by month"""
         stats = {
             'total_movies': len(entries),
             'liked_movies': 0,
@@ -140,23 +176,23 @@ class LetterboxdWrapped:
             if entry.like:
                 stats['liked_movies'] += 1
             
-            # Process ratings
-            if entry.rating and entry.rating.strip():
-                # Convert star rating to number (★★★★★ = 5.0, ★★★★½ = 4.5, etc.)
-                rating_str = entry.rating.strip()
-                full_stars = rating_str.count('★')
-                half_stars = rating_str.count('½')
-                rating_value = full_stars + (half_stars * 0.5)
-                
-                if rating_value > 0:
-                    ratings.append(rating_value)
+            # Ratings are stored in half stars, 0 means unrated
+            if entry.rating:
+                ratings.append(entry.rating)
         
-        # Calculate average rating
+        # Calculate average rating (in stars)
         if ratings:
-            stats['average_rating'] = sum(ratings) / len(ratings)
+            stats['average_rating'] = sum(ratings) / len(ratings) / 2
+
+        if months is not None:
+            stats['months'] = {key: self._calculate_stats(month_entries) for key, month_entries in months.items()}
         
         return stats
 
+    def _stats_months(self):
+        """(year, month) -> entries for the header's films-per-month bars, None for no bars"""
+        return None
+
     def _add_rounded_corners(self, image, radius=15):
         """Add rounded corners to an image"""
         # Create a mask with rounded corners
@@ -171,6 +207,22 @@ class LetterboxdWrapped:
         
         return rounded_image
 
+    def _get_shadow(self, width, height, radius):
+        """Drop shadow for a poster tile, identical for every tile of a size"""
+        key = (width, height, radius)
+        if key not in self._shadows:
+            shadow_offset = 4
+            shadow_color = (10, 10, 10, 100)  # Semi-transparent shadow
+            
+            shadow = Image.new('RGBA', (width + shadow_offset, height + shadow_offset), (0, 0, 0, 0))
+            shadow_draw = ImageDraw.Draw(shadow)
+            shadow_draw.rounded_rectangle(
+                [(shadow_offset, shadow_offset), (width, height)],
+                radius=radius, fill=shadow_color
+            )
+            self._shadows[key] = shadow
+        return self._shadows[key]
+
     def _create_professional_grid(self, images, entries, max_posters=20):
         """Create a clean, professional grid layout"""
         layout_positions = []
@@ -179,7 +231,7 @@ class LetterboxdWrapped:
         num_posters = min(len(images), max_posters)
         
         # Professional spacing and margins with room for stats
-        header_height = 350  # Reduced since stats are now horizontal 
+        header_height = self.header_height
         footer_height = 80   # Minimal footer
         side_margin = 60     
         poster_spacing = 15  # Tighter spacing for more posters
@@ -248,9 +300,15 @@ class LetterboxdWrapped:
                 'height': int(best_config['poster_height'])
             })
         
-        print(f"Created professional grid: {best_config['cols']}x{best_config['rows']} with {num_posters} posters")
+        log.debug("Created professional grid: %dx%d with %d posters", best_config['cols'], best_config['rows'], num_posters)
         return layout_positions
 
+    def _render_tile(self, tile, radius):
+        """Decode one poster, resize and round it; the decoded source is closed straight away"""
+        with tile.open() as source:
+            resized = self._resize_image_clean(source, tile.width, tile.height)
+        return self._add_rounded_corners(resized, radius=radius)
+
     def _resize_image_clean(self, image, width, height):
         """Resize image with high quality"""
         return image.resize((width, height), Image.Resampling.LANCZOS)
@@ -315,12 +373,40 @@ class LetterboxdWrapped:
             return y_position + 40  # Return position after stats
             
         except Exception as e:
-            print(f"Error drawing emoji stats: {e}")
+            log.warning("Error drawing emoji stats: %s", e)
             return y_position
 
-    def create(self):
-        """Create the enhanced Instagram Story wrapped image"""
-        print(f"Creating Enhanced Letterboxd Wrapped for {self.month_name} {self.year}...")
+    def _draw_month_bars(self, draw, month_stats, y_position, bar_height=70):
+        """Draw a small bar chart of films per month with initials underneath"""
+        try:
+            months = [(month_name[month][0].upper(), stats['total_movies']) for (_, month), stats in month_stats.items()]
+            label_font = self._get_font(18, bold=True)
+            slot = min(60, 840 // len(months))
+            bar_width = max(2, slot * 3 // 4)
+            start_x = (self.width - slot * len(months)) // 2
+            peak = max(count for _, count in months) or 1
+
+            for i, (label, count) in enumerate(months):
+                x = start_x + i * slot + (slot - bar_width) // 2
+                height = max(4, round(bar_height * count / peak)) if count else 4
+                color = self.accent_color if count == peak else self.secondary_text
+                draw.rounded_rectangle(
+                    [(x, y_position + bar_height - height), (x + bar_width, y_position + bar_height)],
+                    radius=4, fill=color
+                )
+                label_bbox = draw.textbbox((0, 0), label, font=label_font)
+                label_x = x + (bar_width - (label_bbox[2] - label_bbox[0])) // 2
+                draw.text((label_x, y_position + bar_height + 8), label, fill=self.secondary_text, font=label_font)
+
+            return y_position + bar_height + 34
+        except Exception as e:
+            log.warning("Error drawing month bars: %s", e)
+            return y_position
+
+    @metrics.timed("prepare")
+    def prepare(self):
+        """I/O stage: gather entries, stats, posters and layout into a RenderSpec"""
+        log.info("Preparing wrapped for %s, %s %d", self.user.username, self.month_name, self.year)
         
         # Get monthly entries
         monthly_entries = self._get_monthly_diary_entries()
@@ -328,81 +414,139 @@ class LetterboxdWrapped:
         if not monthly_entries:
             raise ValueError(f"No diary entries found for {self.month_name} {self.year}")
         
-        print(f"Found {len(monthly_entries)} movies watched in {self.month_name} {self.year}")
-        
         # Calculate stats
-        stats = self._calculate_stats(monthly_entries)
-        print(f"Stats: {stats['total_movies']} movies, {stats['liked_movies']} liked, avg rating: {stats['average_rating']:.1f}")
-        
-        # Create base image with gradient background
-        img = Image.new('RGB', (self.width, self.height), self.bg_color)
-        draw = ImageDraw.Draw(img)
-        
-        # Add subtle gradient background
-        for y in range(self.height):
-            gradient_factor = y / self.height
-            r = int(20 + gradient_factor * 8)  # 20 -> 28
-            g = int(24 + gradient_factor * 8)  # 24 -> 32  
-            b = int(28 + gradient_factor * 8)  # 28 -> 36
-            color = (r, g, b)
-            draw.line([(0, y), (self.width, y)], fill=color)
+        stats = self._calculate_stats(monthly_entries, months=self._stats_months())
+        log.debug(
+            "Stats: %d movies, %d liked, avg rating: %.1f",
+            stats['total_movies'], stats['liked_movies'], stats['average_rating']
+        )
         
-        # Get poster images
-        poster_images = []
+        # Pick the grid's films first, then fetch only their posters
+        poster_films = self._resolve_drawn_posters(monthly_entries)
+        log.debug("Drawing %d posters for %d entries", len(poster_films), len(monthly_entries))
         
-        print(f"Fetching poster images...")
-        for i, entry in enumerate(monthly_entries):
-            try:
-                poster = entry.poster_image
-                if poster:
-                    poster_images.append(poster)
-                print(f"Fetched {i+1}/{len(monthly_entries)}: {entry.film_title}")
-            except Exception as e:
-                print(f"Error fetching poster for {entry.film_title}: {e}")
-                continue
-        
-        if not poster_images:
+        if not poster_films:
             raise ValueError("No poster images could be fetched")
         
         # Create professional grid layout
-        layout_positions = self._create_professional_grid(poster_images, monthly_entries)
+        layout_positions = self._create_professional_grid(poster_films, monthly_entries, max_posters=self.max_posters)
+        
+        tiles = []
+        for pos, entry in zip(layout_positions, poster_films):
+            if entry.poster_is_placeholder:
+                # Placeholders only depend on title and year, so their tiles are shared across films
+                tiles.append(TileSpec(
+                    slug=placeholder_key(entry.film_title, entry.film_year),
+                    x=pos['x'],
+                    y=pos['y'],
+                    width=pos['width'],
+                    height=pos['height'],
+                    source=_placeholder_png(entry.film_title, entry.film_year)
+                ))
+                continue
+            tiles.append(TileSpec(
+                slug=entry.film_slug,
+                x=pos['x'],
+                y=pos['y'],
+                width=pos['width'],
+                height=pos['height'],
+                source=entry.poster_path
+            ))
+        
+        return RenderSpec(
+            username=self.user.username,
+            month=self.month,
+            year=self.year,
+            theme=self.theme.name,
+            stats=stats,
+            tiles=tiles,
+            title=self._title(),
+            subtitle=self._subtitle(),
+            profile=self._profile()
+        )
+
+    def _profile(self):
+        """The declared profile fields; nothing is fetched when none are declared"""
+        if not self.profile_fields:
+            return {}
+        self.user.load_profile(*self.profile_fields)
+        return {name: getattr(self.user, name) for name in self.profile_fields}
+
+    def poster_sources(self):
+        """Digest of the posters prepare() would draw, from local state only.
+
+        Matches RenderSpec.sources of that render. None while some poster
+        isn't resolved locally, i.e. the render can only be identified
+        after prepare().
+        """
+        source_ids = []
+        for entry in self._poster_candidates(self._get_monthly_diary_entries()):
+            if not entry.resolve_local_poster():
+                return None
+            if entry.poster_is_placeholder:
+                source_ids.append(_source_id(placeholder_key(entry.film_title, entry.film_year), None))
+            else:
+                source_ids.append(_source_id(entry.film_slug, entry.poster_path))
+        return sources_digest(source_ids)
+
+    def _resolve_drawn_posters(self, entries):
+        """Select the grid's entries and fetch their posters; returns the entries to draw.
+
+        Films whose fetch failed are left out and the selection is run again,
+        so only their replacements are fetched.
+        """
+        failed = set()
+        while True:
+            chosen = self._poster_candidates([e for e in entries if e.film_slug not in failed])
+            ready = resolve_posters(chosen, max_workers=self.poster_workers)
+            missing = {entry.film_slug for entry, ok in zip(chosen, ready) if not ok}
+            if not missing:
+                return chosen
+            failed |= missing
+
+    def _poster_candidates(self, entries):
+        """Entries that get a tile, picked by the selection policy before anything is fetched"""
+        return self.select(entries, self.max_posters)
+
+    def _title(self):
+        return f"{self.user.username}'s month in movies"
+
+    def _subtitle(self):
+        return f"{self.month_name} {self.year}"
+
+    def create(self):
+        """Create the enhanced Instagram Story wrapped image"""
+        return self.compose(self.prepare())
+
+    @metrics.timed("compose")
+    def compose(self, spec):
+        """Render stage: CPU-only compositing of a RenderSpec, no network access"""
+        # Base image with the theme's gradient background (built once per process)
+        img = get_canvas(self.theme, self.width, self.height)
+        tile_cache = get_tile_cache()
+        radius = 12
         
         # Draw movie posters with rounded corners
-        for i, pos in enumerate(layout_positions):
-            if i >= len(poster_images):
-                break
-                
+        for i, tile in enumerate(spec.tiles):
             try:
-                image = poster_images[i]
-                
-                # Resize poster
-                processed_poster = self._resize_image_clean(
-                    image, pos['width'], pos['height']
+                # Resized, rounded poster tile (cached per poster file and size)
+                rounded_poster = tile_cache.get_or_create(
+                    tile.tile_name, tile.width, tile.height, radius,
+                    lambda: self._render_tile(tile, radius)
                 )
                 
-                # Add rounded corners
-                rounded_poster = self._add_rounded_corners(processed_poster, radius=12)
-                
-                # Create shadow
-                shadow_offset = 4
-                shadow_color = (10, 10, 10, 100)  # Semi-transparent shadow
-                
-                # Draw shadow
-                shadow = Image.new('RGBA', (pos['width'] + shadow_offset, pos['height'] + shadow_offset), (0, 0, 0, 0))
-                shadow_draw = ImageDraw.Draw(shadow)
-                shadow_draw.rounded_rectangle(
-                    [(shadow_offset, shadow_offset), (pos['width'], pos['height'])],
-                    radius=12, fill=shadow_color
-                )
+                shadow = self._get_shadow(tile.width, tile.height, radius)
                 
                 # Paste shadow first, then poster
-                img.paste(shadow, (pos['x'], pos['y']), shadow)
-                img.paste(rounded_poster, (pos['x'], pos['y']), rounded_poster)
+                img.paste(shadow, (tile.x, tile.y), shadow)
+                img.paste(rounded_poster, (tile.x, tile.y), rounded_poster)
                     
             except Exception as e:
-                print(f"Error placing poster {i}: {e}")
+                log.warning("Error placing poster %d: %s", i, e)
                 continue
         
+        stats = spec.stats
+        
         # Redraw for text
         draw = ImageDraw.Draw(img)
         
@@ -412,7 +556,7 @@ class LetterboxdWrapped:
             
             # Main title: "username's month in movies"
             title_font = self._get_font(38, bold=True)
-            title_text = f"{self.user.username}'s month in movies"
+            title_text = spec.title
             title_bbox = draw.textbbox((0, 0), title_text, font=title_font)
             title_width = title_bbox[2] - title_bbox[0]
             title_height = title_bbox[3] - title_bbox[1]
@@ -422,7 +566,7 @@ class LetterboxdWrapped:
             
             # Subtitle with accent color  
             subtitle_font = self._get_font(26, bold=True)
-            subtitle_text = f"{self.month_name} {self.year}"
+            subtitle_text = spec.subtitle
             subtitle_bbox = draw.textbbox((0, 0), subtitle_text, font=subtitle_font)
             subtitle_width = subtitle_bbox[2] - subtitle_bbox[0]
             subtitle_x = (self.width - subtitle_width) // 2
@@ -432,9 +576,92 @@ class LetterboxdWrapped:
             # Draw clean emoji stats section (HORIZONTAL layout)
             stats_y = subtitle_y + 35
             final_stats_y = self._draw_emoji_stats(draw, stats, stats_y)
+
+            # Year-in-review: films per month under the stats
+            if stats.get('months'):
+                self._draw_month_bars(draw, stats['months'], final_stats_y + 25)
             
         except Exception as e:
-            print(f"Error drawing header: {e}")
+            log.warning("Error drawing header: %s", e)
         
-        print("Enhanced Letterboxd Wrapped image created successfully!")
-        return img
\ No newline at end of file
+        log.debug("Composed wrapped for %s", spec.username)
+        return img
+
+def bucket_by_month(entries):
+    """Group diary entries by (year, month) in a single pass, keeping their order"""
+    buckets = {}
+    for entry in entries:
+        buckets.setdefault((entry.date.year, entry.date.month), []).append(entry)
+    return buckets
+
+class LetterboxdRecap(LetterboxdWrapped):
+    """Year-in-review (or any date range) wrapped built from one diary scan.
+
+    The range is read once and bucketed by month; the summary image and
+    every monthly image (`monthly_wrappeds`) share that in-memory data.
+    """
+
+    def __init__(self, user, year=None, start=None, end=None, poster_workers=POSTER_WORKERS,
+                 theme=DEFAULT_THEME, max_posters=20, selection="top_rated"):
+        year = year or datetime.now().year
+        self.start = start or date(year, 1, 1)
+        self.end = end or date(year, 12, 31)
+        super().__init__(user, month=self.start.month, year=self.start.year,
+                         poster_workers=poster_workers, theme=theme, selection=selection)
+        self.max_posters = max_posters
+        self.header_height = 450  # Room for the month bars
+        self._buckets = None
+
+    @property
+    def is_calendar_year(self):
+        return (self.start == date(self.start.year, 1, 1) and self.end == date(self.start.year, 12, 31))
+
+    def _get_monthly_diary_entries(self):
+        """Get every diary entry in the range (one store read for all months)"""
+        if self._monthly_entries is not None:
+            return self._monthly_entries
+
+        with metrics.stage("diary"):
+            entries = get_diary_store().diary_range(self.user, self.start, self.end)
+        log.debug("Found %d entries from %s to %s", len(entries), self.start, self.end)
+        self._monthly_entries = entries
+        return entries
+
+    def _range_buckets(self, entries):
+        """(year, month) -> entries for every month in the range, empty months included"""
+        buckets = bucket_by_month(entries)
+        by_month = {}
+        year, month = self.start.year, self.start.month
+        while (year, month) <= (self.end.year, self.end.month):
+            by_month[(year, month)] = buckets.get((year, month), [])
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return by_month
+
+    def months(self):
+        """(year, month) -> the range's entries, empty months included"""
+        if self._buckets is None:
+            self._buckets = self._range_buckets(self._get_monthly_diary_entries())
+        return self._buckets
+
+    def monthly_wrappeds(self, selection=DEFAULT_SELECTION):
+        """A LetterboxdWrapped per non-empty month, reusing the already loaded entries"""
+        return [
+            LetterboxdWrapped(self.user, month=month, year=year, poster_workers=self.poster_workers,
+                              theme=self.theme.name, entries=entries, selection=selection)
+            for (year, month), entries in self.months().items() if entries
+        ]
+
+    def _stats_months(self):
+        # Per-month stats come from the same buckets as the monthly images
+        return self.months()
+
+    def _title(self):
+        if self.is_calendar_year:
+            return f"{self.user.username}'s {self.start.year} in movies"
+        return f"{self.user.username}'s movies"
+
+    def _subtitle(self):
+        if self.is_calendar_year:
+            return "year in review"
+        fmt = lambda d: f"{month_name[d.month].lower()} {d.year}"
+        return f"{fmt(self.start)} – {fmt(self.end)}"
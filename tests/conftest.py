@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the stores, posters and tiles created at import time out of the repo
+os.environ.setdefault("LETTERBOXD_DATA_DIR", tempfile.mkdtemp(prefix="letterboxd-tests-"))
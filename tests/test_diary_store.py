@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+
+import pytest
+
+from letterboxd_scraper import diary_store
+from letterboxd_scraper.diary_store import DiaryStore
+from letterboxd_scraper.film import DiaryEntry
+
+TODAY = date.today()
+
+class FakeUser:
+    """Stands in for LetterboxdUser: an upstream diary served newest first in pages"""
+
+    film_filter = ""
+
+    def __init__(self, entries, page_size=5):
+        self.username = "alice"
+        self.entries = entries
+        self.page_size = page_size
+        self.pages_read = 0
+
+    def diary(self, page=1):
+        self.pages_read += 1
+        return self.entries[(page - 1) * self.page_size:page * self.page_size]
+
+    def diary_range(self, start, end):
+        return [e for e in self.entries if start <= e.date <= end]
+
+def entry(days_ago, slug, rating=6):
+    return DiaryEntry(TODAY - timedelta(days=days_ago), slug, 2000, rating, False, False, slug)
+
+def upstream(count=40, every_days=3):
+    # Spans roughly four months, so older months are immutable and the newest two are not
+    return [entry(i * every_days, f"film-{i}") for i in range(count)]
+
+def stored(store, user):
+    rows = store.diary_range(user, TODAY - timedelta(days=400), TODAY)
+    return [(e.date, e.film_slug, e.rating) for e in rows]
+
+def expected(user):
+    return [(e.date, e.film_slug, e.rating) for e in user.entries]
+
+@pytest.fixture
+def store(tmp_path):
+    return DiaryStore(path=tmp_path / "diaries.sqlite3")
+
+def test_refresh_adds_new_entries(store):
+    user = FakeUser(upstream())
+    assert stored(store, user) == expected(user)
+
+    user.entries = [entry(0, "new-film")] + user.entries
+    store.refresh(user)
+    assert stored(store, user) == expected(user)
+
+def test_refresh_drops_deleted_entries(store):
+    user = FakeUser(upstream())
+    stored(store, user)
+
+    del user.entries[2]
+    store.refresh(user)
+    assert stored(store, user) == expected(user)
+    assert len(stored(store, user)) == len(user.entries)
+
+def test_refresh_moves_entry_with_edited_date(store):
+    user = FakeUser(upstream())
+    stored(store, user)
+
+    # The entry logged 12 days ago is re-dated to today
+    moved = user.entries.pop(4)
+    user.entries.insert(0, entry(0, moved.film_slug))
+    store.refresh(user)
+    rows = stored(store, user)
+    assert rows == expected(user)
+    assert [slug for _, slug, _ in rows].count(moved.film_slug) == 1
+
+def test_refresh_updates_edited_rating(store):
+    user = FakeUser(upstream())
+    stored(store, user)
+
+    user.entries[1] = entry(3, "film-1", rating=10)
+    store.refresh(user)
+    assert stored(store, user) == expected(user)
+
+def test_refresh_stops_mid_month_and_keeps_unread_entries(store):
+    user = FakeUser(upstream(count=60, every_days=2), page_size=7)
+    stored(store, user)
+
+    user.pages_read = 0
+    store.refresh(user)
+    total_pages = -(-len(user.entries) // user.page_size)
+    assert 0 < user.pages_read < total_pages
+    # The last page read ends part-way through a month; the rest of that month is untouched
+    oldest_read = user.entries[user.pages_read * user.page_size - 1].date
+    assert any(e.date.month == oldest_read.month and e.date < oldest_read for e in user.entries)
+    assert stored(store, user) == expected(user)
+
+def test_same_day_entries_keep_diary_order(store):
+    entries = [entry(0, "c"), entry(0, "b"), entry(0, "a")] + upstream()[1:]
+    user = FakeUser(entries, page_size=2)
+    assert stored(store, user) == expected(user)
+
+    store.refresh(user)
+    assert stored(store, user) == expected(user)
+
+def test_month_read_before_it_ended_is_fetched_again(store, monkeypatch):
+    def today_is(day):
+        monkeypatch.setattr(diary_store, "date", type("FakeDate", (date,), {"today": classmethod(lambda cls: day)}))
+
+    def march_entry(day, slug):
+        return DiaryEntry(date(2026, 3, day), slug, 2000, 6, False, False, slug)
+
+    march = (date(2026, 3, 1), date(2026, 3, 31))
+    april = (date(2026, 4, 1), date(2026, 4, 30))
+    user = FakeUser([march_entry(9, "c"), march_entry(5, "b"), march_entry(1, "a")])
+
+    today_is(date(2026, 3, 10))
+    assert len(store.diary_range(user, *march)) == 3
+    assert store.diary_range(user, *april) == []
+
+    # Logged after the first read, but before March left the mutable months
+    user.entries = [
+        DiaryEntry(date(2026, 4, 2), "d", 2000, 6, False, False, "d"),
+        march_entry(28, "f"), march_entry(20, "e"),
+    ] + user.entries
+    today_is(date(2026, 6, 2))
+    assert [e.film_slug for e in store.diary_range(user, *march)] == ["f", "e", "c", "b", "a"]
+    assert [e.film_slug for e in store.diary_range(user, *april)] == ["d"]
+
+    # Read again once it was over: final from now on
+    user.entries.insert(0, march_entry(30, "g"))
+    assert len(store.diary_range(user, *march)) == 5
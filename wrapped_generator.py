@@ -0,0 +1,273 @@
+"""Generate wrapped images for many users and months in one run.
+
+    python wrapped_generator.py username --month 7 --year 2025
+    python wrapped_generator.py alice bob --from 2025-01 --to 2025-06 --out wrapped/
+    python wrapped_generator.py --users-file users.txt --month 7 --year 2025
+    python wrapped_generator.py alice --recap --year 2025 --with-months
+
+All jobs share the process-wide HTTP session, poster index, tile and font
+caches. Diaries are loaded first, then every distinct poster across all
+users is fetched once, and finally the images are rendered in parallel
+through the render pool. Re-running with the same output directory skips
+images whose diary month hasn't changed since they were written.
+
+With --recap each user gets one year-in-review image (or one for the
+--from/--to range) instead; --with-months adds the monthly images, built
+from the same single diary scan.
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from calendar import monthrange
+from datetime import date, datetime
+from pathlib import Path
+
+from letterboxd_scraper import LetterboxdUser, LetterboxdWrapped, LetterboxdRecap
+from letterboxd_scraper import metrics, render_pool
+from letterboxd_scraper.atomic import write_atomic
+from letterboxd_scraper.config import POSTER_WORKERS, RENDER_PROCESSES, LOG_LEVEL
+from letterboxd_scraper.http_client import get_client
+from letterboxd_scraper.output import FORMATS, DEFAULT_FORMAT
+from letterboxd_scraper.posters import resolve_posters
+from letterboxd_scraper.selection import SELECTIONS, DEFAULT_SELECTION
+from letterboxd_scraper.themes import THEMES, DEFAULT_THEME
+
+MANIFEST = "manifest.json"
+
+log = logging.getLogger("wrapped_generator")
+
+def _parse_month(value):
+    try:
+        parsed = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got '{value}'")
+    return parsed.year, parsed.month
+
+def _months(start, end):
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+class BatchJob:
+    def __init__(self, wrapped, name):
+        self.wrapped = wrapped
+        self.name = name
+        self.fingerprint = None
+        self.entries = []
+
+    @classmethod
+    def month(cls, wrapped):
+        return cls(wrapped, f"{wrapped.user.username}-{wrapped.year}-{wrapped.month:02d}")
+
+    @classmethod
+    def recap(cls, recap):
+        if recap.is_calendar_year:
+            return cls(recap, f"{recap.user.username}-{recap.start.year}")
+        return cls(recap, f"{recap.user.username}-{recap.start:%Y-%m}-to-{recap.end:%Y-%m}")
+
+class Generator:
+    """One batch run: load diaries, fetch shared posters, render, write"""
+
+    def __init__(self, out_dir, fmt=DEFAULT_FORMAT, theme=DEFAULT_THEME, workers=None,
+                 poster_workers=POSTER_WORKERS, force=False, selection=None):
+        self.out_dir = Path(out_dir)
+        self.fmt = fmt
+        self.theme = theme
+        self.selection = selection  # None: each image type's default policy
+        self.workers = workers or max(1, RENDER_PROCESSES)
+        self.poster_workers = poster_workers
+        self.force = force
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._manifest = self._load_manifest()
+        self._lock = threading.Lock()
+        self.counts = {"rendered": 0, "unchanged": 0, "empty": 0, "failed": 0}
+
+    def _load_manifest(self):
+        try:
+            with open(self.out_dir / MANIFEST) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        write_atomic(self.out_dir / MANIFEST, json.dumps(self._manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    def _path(self, job):
+        return self.out_dir / f"{job.name}.{FORMATS[self.fmt].extension}"
+
+    def _count(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def _manifest_entry(self, job):
+        return {"fingerprint": job.fingerprint, "theme": self.theme, "selection": self.selection}
+
+    def _load(self, job):
+        """Diary stage: fetch the month's entries and decide whether to render"""
+        try:
+            job.fingerprint = job.wrapped.fingerprint()
+            job.entries = job.wrapped._get_monthly_diary_entries()
+        except Exception as e:
+            log.warning("[%s] failed to load diary: %s", job.name, e)
+            self._count("failed")
+            return None
+
+        if not job.entries:
+            log.info("[%s] no diary entries, skipping", job.name)
+            self._count("empty")
+            return None
+
+        done = self._manifest.get(job.name)
+        if not self.force and done == self._manifest_entry(job) and self._path(job).exists():
+            self._count("unchanged")
+            return None
+        return job
+
+    def _render(self, job):
+        """Render stage: build the spec (posters are warm by now) and write the image"""
+        try:
+            spec = job.wrapped.prepare()
+            [data] = render_pool.render(spec, [(self.fmt, False)])
+            write_atomic(self._path(job), data)
+            with self._lock:
+                if spec.has_placeholders:
+                    # Not up to date yet: the next run retries the missing posters
+                    self._manifest.pop(job.name, None)
+                else:
+                    self._manifest[job.name] = self._manifest_entry(job)
+                self._save_manifest()
+            if spec.has_placeholders:
+                log.warning("[%s] wrote %s with placeholder posters, will re-render next run", job.name, self._path(job))
+            else:
+                log.info("[%s] wrote %s (%d KB)", job.name, self._path(job), len(data) // 1024)
+            self._count("rendered")
+        except Exception as e:
+            log.exception("[%s] failed to render: %s", job.name, e)
+            self._count("failed")
+        finally:
+            # Drop the job's entries as soon as it is done
+            job.entries = []
+            job.wrapped = None
+
+    def run(self, usernames, months, recap=False, with_months=False):
+        started = time.perf_counter()
+        collected, token = metrics.start_request()
+        users = {name: LetterboxdUser(name) for name in dict.fromkeys(usernames)}
+        load = metrics.bind(self._load)
+        options = {"theme": self.theme}
+        if self.selection:
+            options["selection"] = self.selection
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="diary") as pool:
+            if recap:
+                start = date(*months[0], 1)
+                end = date(*months[-1], monthrange(*months[-1])[1])
+                jobs = [
+                    BatchJob.recap(LetterboxdRecap(user, start=start, end=end, **options))
+                    for user in users.values()
+                ]
+                pending = [job for job in pool.map(load, jobs) if job is not None]
+                if with_months:
+                    # Monthly images reuse each recap's already loaded entries
+                    month_jobs = [
+                        BatchJob.month(wrapped)
+                        for job in jobs if job.entries
+                        for wrapped in job.wrapped.monthly_wrappeds(self.selection or DEFAULT_SELECTION)
+                    ]
+                    jobs += month_jobs
+                    pending += [job for job in map(load, month_jobs) if job is not None]
+            else:
+                jobs = [
+                    BatchJob.month(LetterboxdWrapped(user, month=month, year=year, **options))
+                    for user in users.values() for year, month in months
+                ]
+                pending = [job for job in pool.map(load, jobs) if job is not None]
+        loaded = time.perf_counter()
+
+        # One fetch per distinct film, however many users logged it
+        unique = {}
+        total_entries = 0
+        for job in pending:
+            # Only the posters each grid draws; prepare() fetches replacements for failures
+            candidates = job.wrapped._poster_candidates(job.entries)
+            total_entries += len(candidates)
+            for entry in candidates:
+                unique.setdefault(entry.film_slug, entry)
+        log.info("Fetching %d distinct posters for %d diary entries", len(unique), total_entries)
+        resolve_posters(list(unique.values()), max_workers=self.poster_workers)
+        fetched = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            list(pool.map(metrics.bind(self._render), pending))
+        finished = time.perf_counter()
+
+        elapsed = finished - started
+        print()
+        print(f"{len(jobs)} jobs in {elapsed:.1f}s: " + ", ".join(f"{n} {k}" for k, n in self.counts.items()))
+        print(f"  diaries: {loaded - started:6.1f}s")
+        print(f"  posters: {fetched - loaded:6.1f}s ({len(unique)} distinct of {total_entries})")
+        print(f"  render:  {finished - fetched:6.1f}s")
+        if self.counts["rendered"]:
+            print(f"  throughput: {self.counts['rendered'] / elapsed:.2f} images/s")
+        for host, stats in get_client().stats().items():
+            print(f"  {host}: {stats['requests']} requests, {stats['errors']} errors, avg {stats['avg_ms']} ms")
+
+        # Summed over worker threads, so these can exceed the wall-clock stages above
+        metrics.end_request(token)
+        print("  stage totals:")
+        for stage, (count, ms) in collected.stages().items():
+            print(f"    {stage:<16} {ms / 1000:8.2f}s over {count}")
+        return self.counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("usernames", nargs="*")
+    parser.add_argument("--users-file", help="file with one username per line")
+    parser.add_argument("--month", type=int, help="single month (1-12), with --year")
+    parser.add_argument("--year", type=int)
+    parser.add_argument("--from", dest="start", type=_parse_month, help="first month, YYYY-MM")
+    parser.add_argument("--to", dest="end", type=_parse_month, help="last month, YYYY-MM (default: --from)")
+    parser.add_argument("--out", default="wrapped", help="output directory (default: wrapped/)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default=DEFAULT_FORMAT)
+    parser.add_argument("--theme", choices=sorted(THEMES), default=DEFAULT_THEME)
+    parser.add_argument("--selection", choices=sorted(SELECTIONS),
+                        help="which films get a poster (default: highlights, top_rated for --recap)")
+    parser.add_argument("--workers", type=int, help="parallel jobs (default: render processes)")
+    parser.add_argument("--poster-workers", type=int, default=POSTER_WORKERS)
+    parser.add_argument("--recap", action="store_true", help="one year-in-review image per user (--year or --from/--to)")
+    parser.add_argument("--with-months", action="store_true", help="with --recap, also render each month")
+    parser.add_argument("--force", action="store_true", help="re-render images that are already up to date")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    usernames = list(args.usernames)
+    if args.users_file:
+        with open(args.users_file) as f:
+            usernames += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not usernames:
+        parser.error("no usernames given")
+
+    now = datetime.now()
+    if args.start:
+        months = list(_months(args.start, args.end or args.start))
+    elif args.recap and not args.month:
+        months = list(_months((args.year or now.year, 1), (args.year or now.year, 12)))
+    else:
+        months = [(args.year or now.year, args.month or now.month)]
+    if not months or any(not 1 <= month <= 12 for _, month in months):
+        parser.error("invalid month range")
+
+    generator = Generator(
+        args.out, fmt=args.format, theme=args.theme, workers=args.workers,
+        poster_workers=args.poster_workers, force=args.force, selection=args.selection
+    )
+    counts = generator.run(usernames, months, recap=args.recap, with_months=args.with_months)
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())